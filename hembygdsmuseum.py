@@ -11,28 +11,400 @@ from datetime import datetime
 import os
 import shutil
 from pathlib import Path
-from PIL import Image, ImageTk
+from PIL import Image, ImageOps, ImageTk
 import webbrowser
 import tempfile
 import base64
+from html import escape
+import hashlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import queue
+import threading
+import functools
+import bisect
+
+class _RadBas(tuple):
+    """Gemensam bas för databasrader: både rad.namn och rad['namn'] fungerar"""
+    __slots__ = ()
+    _index = {}
+
+    def __getitem__(self, nyckel):
+        if isinstance(nyckel, str):
+            nyckel = self._index[nyckel]
+        return tuple.__getitem__(self, nyckel)
+
+    def keys(self):
+        return list(self._index)
+
+
+_RADTYPER = {}
+_senaste_radtyp = (None, None)
+
+
+def radtyp(kolumner):
+    """Hämta (eller skapa) radtypen för en tupel av kolumnnamn"""
+    typ = _RADTYPER.get(kolumner)
+    if typ is None:
+        index = {}
+        for i, namn in enumerate(kolumner):
+            index.setdefault(namn, i)
+        bas = namedtuple('Rad', kolumner, rename=True)
+        typ = type('Rad', (_RadBas, bas), {'__slots__': (), '_index': index})
+        _RADTYPER[kolumner] = typ
+    return typ
+
+
+def rad_factory(cursor, rad):
+    """row_factory som ger namedtuple-rader
+
+    Kolumnvärden nås som attribut (rad.namn) utan namnuppslagning per
+    åtkomst. Radtypen skapas en gång per kolumnlista och återanvänds.
+    """
+    global _senaste_radtyp
+    beskrivning = cursor.description
+    senaste_beskrivning, typ = _senaste_radtyp
+    if beskrivning is not senaste_beskrivning:
+        typ = radtyp(tuple(kol[0] for kol in beskrivning))
+        _senaste_radtyp = (beskrivning, typ)
+    return tuple.__new__(typ, rad)
+
+
+# Antal förberedda SQL-satser som sparas per anslutning (standard är 128)
+SQL_SATSCACHE = 256
+
+
+class ConnectionPool:
+    """Trådsäker pool av skrivskyddade anslutningar för läsfrågor
+
+    Läsningar från GUI:t och bakgrundstrådar får var sin anslutning och
+    behöver inte turas om med skrivanslutningen i MuseumDB.
+    """
+
+    def __init__(self, db_path, storlek=4):
+        self.uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+        self.storlek = storlek
+        self._lediga = queue.Queue()
+        self._alla = []
+        self._las = threading.Lock()
+        self._stangd = False
+
+    def _oppna(self):
+        """Öppna en ny skrivskyddad anslutning"""
+        conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False,
+                               cached_statements=SQL_SATSCACHE)
+        conn.row_factory = rad_factory
+        conn.execute("PRAGMA cache_size=-20000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        return conn
+
+    def _ta(self):
+        """Ta en ledig anslutning, öppna en ny om poolen inte är full
+
+        Kastar sqlite3.ProgrammingError om poolen är stängd, även för en
+        tråd som redan väntar på en ledig anslutning.
+        """
+        try:
+            conn = self._lediga.get_nowait()
+        except queue.Empty:
+            with self._las:
+                if self._stangd:
+                    raise sqlite3.ProgrammingError("Anslutningspoolen är stängd")
+                if len(self._alla) < self.storlek:
+                    conn = self._oppna()
+                    self._alla.append(conn)
+                    return conn
+            conn = self._lediga.get()
+
+        if conn is None:
+            # stang() har lagt None i kön, lämna den kvar åt nästa som väntar
+            self._lediga.put(None)
+            raise sqlite3.ProgrammingError("Anslutningspoolen är stängd")
+        return conn
+
+    def _lamna(self, conn):
+        """Lämna tillbaka en lånad anslutning, eller stäng den om poolen har stängts"""
+        with self._las:
+            if self._stangd:
+                conn.close()
+            else:
+                self._lediga.put(conn)
+
+    @contextmanager
+    def hamta(self):
+        """Låna en cursor från poolen: with pool.hamta() as cur: ..."""
+        conn = self._ta()
+        cur = conn.cursor()
+        try:
+            yield cur
+        finally:
+            cur.close()
+            self._lamna(conn)
+
+    def stang(self):
+        """Stäng alla anslutningar i poolen
+
+        Anslutningar som är utlånade till en bakgrundstråd stängs när de lämnas
+        tillbaka (se _lamna). Poolen kan inte användas efter att den stängts.
+        """
+        with self._las:
+            self._stangd = True
+            self._alla = []
+            while True:
+                try:
+                    conn = self._lediga.get_nowait()
+                except queue.Empty:
+                    break
+                if conn is not None:
+                    conn.close()
+            # Väck trådar som väntar i _ta
+            self._lediga.put(None)
+
+
+# Katalog för nedskalade kopior av bilderna
+MINIATYR_KATALOG = Path("thumbnails")
+
+# Största sida för förhandsvisningen i visa_bild_fullstorlek
+FORHANDSVISNING_STORLEK = 1000
+
+# Största sida för miniatyrerna i detaljfönstret
+DETALJ_MINIATYR_STORLEK = 150
+
+
+def ladda_nedskalad(bildsokvag, max_bredd, max_hojd):
+    """Läs in en bild nedskalad till högst max_bredd x max_hojd, vänd enligt EXIF
+
+    JPEG avkodas direkt i 1/2, 1/4 eller 1/8 storlek med draft (ingen effekt
+    för andra format), så att hela originalet aldrig behöver packas upp.
+    """
+    img = Image.open(bildsokvag)
+    # Bilder som ska vridas en kvarts varv (EXIF-orientering 5-8) skalas med bytt format
+    if img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+        max_bredd, max_hojd = max_hojd, max_bredd
+    img.draft('RGB', (max_bredd, max_hojd))
+    img.thumbnail((max_bredd, max_hojd), Image.Resampling.LANCZOS)
+    return ImageOps.exif_transpose(img)
+
+
+def miniatyr_sokvag(bildsokvag, max_storlek=800):
+    """Sökvägen till den nedskalade kopian av en bild i MINIATYR_KATALOG
+
+    Namnet bygger på originalets ändringstid, så originalet måste finnas (annars OSError).
+    """
+    mtime = os.path.getmtime(bildsokvag)
+    # "exif": kopian är vänd enligt EXIF, äldre kopior utan det skapas om
+    nyckel = f"{bildsokvag}|{mtime}|{max_storlek}|exif".encode('utf-8')
+    return MINIATYR_KATALOG / f"{hashlib.sha1(nyckel).hexdigest()}.jpg"
+
+
+def skapa_miniatyr(bildsokvag, max_storlek=800):
+    """Skapa (eller återanvänd) en nedskalad JPEG-kopia av en bild
+
+    Kopian sparas i MINIATYR_KATALOG med ett namn som bygger på sökväg,
+    ändringstid och storlek, så en ändrad originalbild ger en ny kopia.
+    Returnerar sökvägen till kopian, eller None om bilden inte kunde läsas.
+    """
+    try:
+        miniatyr = miniatyr_sokvag(bildsokvag, max_storlek)
+        if miniatyr.exists():
+            return str(miniatyr)
+
+        MINIATYR_KATALOG.mkdir(exist_ok=True)
+        img = ladda_nedskalad(bildsokvag, max_storlek, max_storlek)
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            # JPEG saknar genomskinlighet, lägg bilden på vit bakgrund
+            img = img.convert('RGBA')
+            bakgrund = Image.new('RGB', img.size, 'white')
+            bakgrund.paste(img, mask=img.getchannel('A'))
+            img = bakgrund
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        # Skriv till en temporär fil först, så att ingen annan tråd läser en halvskriven miniatyr
+        tmp = miniatyr.with_name(f"{miniatyr.stem}.{threading.get_ident()}.tmp")
+        img.save(tmp, format='JPEG', optimize=True, quality=85)
+        os.replace(tmp, miniatyr)
+        return str(miniatyr)
+    except Exception as e:
+        print(f"Kunde inte skapa miniatyr för {bildsokvag}: {e}")
+        return None
+
+
+# Utfallet för en bild i en import, se MuseumGUI.slutfor_bildimport
+Bildimport = namedtuple('Bildimport', ['namn', 'ok', 'fel'])
+
+
+def importera_bild(kalla, mal):
+    """Kopiera en bild till mal och skapa dess miniatyrer, kan köras i en bakgrundstråd
+
+    Både utskriftsminiatyren och förhandsvisningen skapas direkt, så att
+    originalet inte behöver avkodas när bilden sedan visas eller skrivs ut.
+    mal ska vara sökvägen som den sparas i databasen, den ingår i cachenyckeln.
+    Returnerar sökvägen till utskriftsminiatyren (None om den inte kunde skapas).
+    """
+    shutil.copyfile(kalla, mal)  # copyfile använder sendfile på Linux
+    skapa_miniatyr(mal, FORHANDSVISNING_STORLEK)
+    return skapa_miniatyr(mal)
+
+
+def ta_bort_bild(bildsokvag, miniatyr=None):
+    """Ta bort en bild från disken tillsammans med dess miniatyrer
+
+    Både miniatyrerna som importera_bild skapar och den som detaljfönstret
+    skapar tas bort. miniatyr är den sparade utskriftsminiatyren, om den är
+    känd. Fel skrivs ut men avbryter inte, filer som redan saknas hoppas över.
+    """
+    sokvagar = [miniatyr]
+    try:
+        # Namnen räknas fram från originalet, så det tas bort sist
+        sokvagar.append(miniatyr_sokvag(bildsokvag))
+        sokvagar.append(miniatyr_sokvag(bildsokvag, FORHANDSVISNING_STORLEK))
+        sokvagar.append(miniatyr_sokvag(bildsokvag, DETALJ_MINIATYR_STORLEK))
+    except OSError:
+        pass  # Originalet saknas, bara den sparade miniatyren kan tas bort
+    sokvagar.append(bildsokvag)
+
+    for sokvag in dict.fromkeys(str(s) for s in sokvagar if s):
+        try:
+            os.remove(sokvag)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Kunde inte ta bort bildfil {sokvag}: {e}")
+
+
+def ladda_miniatyrbild(bildsokvag, max_storlek):
+    """Läs in en bild nedskalad till max_storlek px, kan köras i en bakgrundstråd
+
+    Den nedskalade bilden sparas i miniatyrcachen (se skapa_miniatyr), så
+    originalet behöver bara avkodas första gången.
+    """
+    miniatyr = skapa_miniatyr(bildsokvag, max_storlek)
+    if miniatyr:
+        img = Image.open(miniatyr)
+        img.load()
+        return img
+
+    return ladda_nedskalad(bildsokvag, max_storlek, max_storlek)
+
+
+@functools.lru_cache(maxsize=8)
+def ladda_forhandsvisning(bildsokvag, max_bredd, max_hojd, original=False):
+    """Läs in en bild för bildvisningen, nedskalad till max_bredd x max_hojd
+
+    De senast visade bilderna hålls i minnet, så att man kan bläddra fram
+    och tillbaka utan att avkoda dem igen. Bilder i images-mappen ändras
+    aldrig efter import, så sökvägen räcker som nyckel.
+    """
+    if original:
+        return ladda_nedskalad(bildsokvag, max_bredd, max_hojd)
+    img = ladda_miniatyrbild(bildsokvag, FORHANDSVISNING_STORLEK)
+    img.thumbnail((max_bredd, max_hojd))
+    return img
+
+
+def _cachad(nyckel):
+    """Spara resultatet av en hamta-metod i MuseumDB._cache tills det ogiltigförklaras"""
+    def dekorator(metod):
+        @functools.wraps(metod)
+        def omslag(self):
+            try:
+                return self._cache[nyckel]
+            except KeyError:
+                version = self._cache_version
+                resultat = tuple(metod(self))
+                self._spara_i_cache(nyckel, resultat, version)
+                return resultat
+        return omslag
+    return dekorator
 
 
 class MuseumDB:
     """Hanterar databaskommunikation för museet"""
 
+    # Platsens visningsnamn "byggnad - rum - hylla" byggs när platsen sparas
+    _SQL_PLATS_VISNINGSNAMN = """
+        byggnad || COALESCE(' - ' || NULLIF(rum, ''), '')
+                || COALESCE(' - ' || NULLIF(hylla_sektion, ''), '')
+    """
+
+    _SQL_NY_PLATS = """
+        INSERT INTO platser (byggnad, rum, hylla_sektion, visningsnamn)
+        VALUES (?1, ?2, ?3, ?1 || COALESCE(' - ' || NULLIF(?2, ''), '')
+                               || COALESCE(' - ' || NULLIF(?3, ''), ''))
+    """
+
     def __init__(self, db_path="hembygdsmuseum.db"):
         self.db_path = db_path
         self.conn = None
         self.cursor = None
+        # Sällan ändrade listor (kategorier, platser, givare), se _cachad.
+        # Versionen räknas upp vid varje ogiltigförklaring, så att en hämtning
+        # i en bakgrundstråd inte sparar ett resultat som hann bli inaktuellt.
+        self._cache = {}
+        self._cache_version = 0
+        self._cache_las = threading.Lock()
+        # Foton per föremål-id, de senast använda sist (se hamta_foton)
+        self._foton_cache = {}
+        # Antal öppna transaktion()-block, bara det yttersta committar
+        self._transaktionsdjup = 0
+        # Cachenycklar som ska ogiltigförklaras när den yttersta transaktionen committat
+        self._vantande_ogiltigforklaringar = set()
         self.anslut()
         self.skapa_tabeller()
 
+        # Läsningar går via egna skrivskyddade anslutningar
+        self.pool = ConnectionPool(self.db_path)
+
     def anslut(self):
         """Anslut till databasen"""
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.row_factory = sqlite3.Row
+        self.conn = sqlite3.connect(self.db_path, cached_statements=SQL_SATSCACHE)
+        self.conn.row_factory = rad_factory
         self.cursor = self.conn.cursor()
 
+        # WAL gör att läsningar inte blockeras av skrivningar och minskar antalet fsync
+        try:
+            journal = self.cursor.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        except sqlite3.OperationalError:
+            journal = None  # T.ex. skrivskyddat filsystem, behåll standardjournalen
+
+        if journal == 'wal':
+            # NORMAL är säkert i WAL-läge (bara senaste commit kan gå förlorad vid strömavbrott)
+            self.cursor.execute("PRAGMA synchronous=NORMAL")
+            # Korta ner WAL-filen efter checkpoint i stället för att låta den ligga kvar i full storlek
+            self.cursor.execute("PRAGMA journal_size_limit=67108864")
+        self.cursor.execute("PRAGMA cache_size=-20000")
+        self.cursor.execute("PRAGMA temp_store=MEMORY")
+        self.cursor.execute("PRAGMA mmap_size=268435456")
+        self.cursor.execute("PRAGMA foreign_keys=ON")
+
+    @contextmanager
+    def transaktion(self):
+        """Samla ändringar i en transaktion: with db.transaktion() as cur: ...
+
+        Nästlade block ingår i det yttersta, som committar när det avslutas
+        och rullar tillbaka om ett undantag kastas.
+        """
+        self._transaktionsdjup += 1
+        try:
+            yield self.cursor
+        except BaseException:
+            self._transaktionsdjup -= 1
+            if self._transaktionsdjup == 0:
+                self.conn.rollback()
+                self._vantande_ogiltigforklaringar.clear()  # Inget ändrades
+            raise
+        self._transaktionsdjup -= 1
+        if self._transaktionsdjup == 0:
+            try:
+                self.conn.commit()
+            finally:
+                nycklar = self._vantande_ogiltigforklaringar
+                self._vantande_ogiltigforklaringar = set()
+                if nycklar:
+                    self._ogiltigforklara(*nycklar)
+
     def skapa_tabeller(self):
         """Skapa alla nödvändiga tabeller"""
 
@@ -104,10 +476,17 @@ class MuseumDB:
                 byggnad TEXT NOT NULL,
                 rum TEXT,
                 hylla_sektion TEXT,
-                anteckningar TEXT
+                anteckningar TEXT,
+                visningsnamn TEXT
             )
         """)
 
+        # Äldre databaser saknar kolumnen med färdigbyggt visningsnamn
+        kolumner = [kol['name'] for kol in self.cursor.execute("PRAGMA table_info(platser)")]
+        if 'visningsnamn' not in kolumner:
+            self.cursor.execute("ALTER TABLE platser ADD COLUMN visningsnamn TEXT")
+            self.cursor.execute(f"UPDATE platser SET visningsnamn = {self._SQL_PLATS_VISNINGSNAMN}")
+
         # Foton
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS foton (
@@ -117,10 +496,16 @@ class MuseumDB:
                 beskrivning TEXT,
                 fotograf TEXT,
                 datum TEXT,
+                miniatyr_sokvag TEXT,
                 FOREIGN KEY (foremal_id) REFERENCES foremal(id)
             )
         """)
 
+        # Äldre databaser saknar kolumnen för miniatyrer
+        kolumner = [kol['name'] for kol in self.cursor.execute("PRAGMA table_info(foton)")]
+        if 'miniatyr_sokvag' not in kolumner:
+            self.cursor.execute("ALTER TABLE foton ADD COLUMN miniatyr_sokvag TEXT")
+
         # Utställningar
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS utstallningar (
@@ -157,8 +542,150 @@ class MuseumDB:
             )
         """)
 
+        # Index på främmande nycklar och sökkolumner (SQLite indexerar dem inte automatiskt)
+        index = [
+            "CREATE INDEX IF NOT EXISTS idx_foremal_kategori ON foremal(kategori_id)",
+            "CREATE INDEX IF NOT EXISTS idx_foremal_placering ON foremal(placering_id)",
+            "CREATE INDEX IF NOT EXISTS idx_foremal_datum ON foremal(datum_registrerat DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_foremal_accnr ON foremal(accessionsnummer COLLATE NOCASE)",
+            "CREATE INDEX IF NOT EXISTS idx_foton_foremal ON foton(foremal_id)",
+            "CREATE INDEX IF NOT EXISTS idx_foremal_givare_foremal ON foremal_givare(foremal_id)",
+            "CREATE INDEX IF NOT EXISTS idx_foremal_givare_givare ON foremal_givare(givare_id)",
+            "CREATE INDEX IF NOT EXISTS idx_foremal_utstallning ON foremal_utstallning(foremal_id, utstallning_id)",
+            "CREATE INDEX IF NOT EXISTS idx_konservering_foremal ON konservering(foremal_id)",
+        ]
+        for sql in index:
+            self.cursor.execute(sql)
+
+        self.fts_aktiv = self.skapa_fulltextindex()
+        self.skapa_kategoristatistik()
+
         self.conn.commit()
-        self.lagg_till_standardkategorier()
+
+        # Standardkategorierna behövs bara i en ny, tom databas
+        if self.cursor.execute("SELECT 1 FROM kategorier LIMIT 1").fetchone() is None:
+            self.lagg_till_standardkategorier()
+
+        # Låt SQLite uppdatera statistiken för frågeplaneraren vid behov
+        self.cursor.execute("PRAGMA optimize")
+
+    def skapa_fulltextindex(self):
+        """Skapa FTS5-index för fritextsökning i föremål
+
+        Indexet delar upp texten i trigram, så att ett sökord hittas var som
+        helst i ett ord ("maskin" i "Slåttermaskin"), som med LIKE. Indexet
+        hålls uppdaterat med triggers. Returnerar False om SQLite saknar stöd
+        för FTS5 eller trigram (före 3.34), sökningen använder då LIKE istället.
+        """
+        try:
+            self.cursor.execute("CREATE VIRTUAL TABLE temp.fts_test USING fts5(x, tokenize='trigram')")
+            self.cursor.execute("DROP TABLE temp.fts_test")
+        except sqlite3.OperationalError:
+            return False
+
+        fanns = self.cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'foremal_fts'"
+        ).fetchone()
+        if fanns and 'trigram' not in fanns[0]:
+            # Äldre index med hela ord (bara prefixsökning), byggs om med trigram
+            self.cursor.execute("DROP TABLE foremal_fts")
+            fanns = None
+
+        self.cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS foremal_fts USING fts5(
+                namn, beskrivning, accessionsnummer,
+                content='foremal', content_rowid='id',
+                tokenize='trigram'
+            )
+        """)
+
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS foremal_ai AFTER INSERT ON foremal BEGIN
+                INSERT INTO foremal_fts (rowid, namn, beskrivning, accessionsnummer)
+                VALUES (new.id, new.namn, new.beskrivning, new.accessionsnummer);
+            END
+        """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS foremal_ad AFTER DELETE ON foremal BEGIN
+                INSERT INTO foremal_fts (foremal_fts, rowid, namn, beskrivning, accessionsnummer)
+                VALUES ('delete', old.id, old.namn, old.beskrivning, old.accessionsnummer);
+            END
+        """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS foremal_au
+            AFTER UPDATE OF namn, beskrivning, accessionsnummer ON foremal BEGIN
+                INSERT INTO foremal_fts (foremal_fts, rowid, namn, beskrivning, accessionsnummer)
+                VALUES ('delete', old.id, old.namn, old.beskrivning, old.accessionsnummer);
+                INSERT INTO foremal_fts (rowid, namn, beskrivning, accessionsnummer)
+                VALUES (new.id, new.namn, new.beskrivning, new.accessionsnummer);
+            END
+        """)
+
+        # Fyll indexet med befintliga föremål första gången
+        if not fanns:
+            self.cursor.execute("INSERT INTO foremal_fts (foremal_fts) VALUES ('rebuild')")
+
+        return True
+
+    def skapa_kategoristatistik(self):
+        """Skapa tabell med antal föremål per kategori, uppdaterad av triggers
+
+        Statistikfliken kan då läsa antalen direkt istället för att
+        gruppera hela föremålstabellen varje gång.
+        """
+        fanns = self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'kategori_statistik'"
+        ).fetchone()
+
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS kategori_statistik (
+                kategori_id INTEGER PRIMARY KEY,
+                antal INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS kategori_statistik_ai AFTER INSERT ON foremal
+            WHEN new.kategori_id IS NOT NULL BEGIN
+                INSERT OR IGNORE INTO kategori_statistik (kategori_id, antal) VALUES (new.kategori_id, 0);
+                UPDATE kategori_statistik SET antal = antal + 1 WHERE kategori_id = new.kategori_id;
+            END
+        """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS kategori_statistik_ad AFTER DELETE ON foremal
+            WHEN old.kategori_id IS NOT NULL BEGIN
+                UPDATE kategori_statistik SET antal = antal - 1 WHERE kategori_id = old.kategori_id;
+            END
+        """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS kategori_statistik_au AFTER UPDATE OF kategori_id ON foremal
+            WHEN old.kategori_id IS NOT new.kategori_id BEGIN
+                UPDATE kategori_statistik SET antal = antal - 1 WHERE kategori_id = old.kategori_id;
+                INSERT OR IGNORE INTO kategori_statistik (kategori_id, antal)
+                    SELECT new.kategori_id, 0 WHERE new.kategori_id IS NOT NULL;
+                UPDATE kategori_statistik SET antal = antal + 1 WHERE kategori_id = new.kategori_id;
+            END
+        """)
+
+        # Räkna befintliga föremål första gången
+        if not fanns:
+            self.cursor.execute("""
+                INSERT INTO kategori_statistik (kategori_id, antal)
+                SELECT kategori_id, COUNT(*) FROM foremal
+                WHERE kategori_id IS NOT NULL
+                GROUP BY kategori_id
+            """)
+
+    @staticmethod
+    def fulltextfraga(sokterm):
+        """Gör om en sökterm till en FTS5-fråga där varje ord ska finnas någonstans i texten
+
+        Trigramindexet kan inte söka på ord kortare än tre tecken, då returneras None.
+        """
+        ord_lista = sokterm.split()
+        if any(len(o) < 3 for o in ord_lista):
+            return None
+        return " ".join('"' + o.replace('"', '""') + '"' for o in ord_lista)
 
     def lagg_till_standardkategorier(self):
         """Lägg till grundläggande kategorier om de inte finns"""
@@ -177,13 +704,21 @@ class MuseumDB:
             "Övrigt"
         ]
 
-        for kat in standardkategorier:
-            try:
-                self.cursor.execute("INSERT INTO kategorier (namn) VALUES (?)", (kat,))
-            except sqlite3.IntegrityError:
-                pass  # Kategorin finns redan
+        self.lagg_till_kategorier_batch(standardkategorier)
+        self.cursor.execute("ANALYZE")
 
-        self.conn.commit()
+    def lagg_till_kategorier_batch(self, namn_lista):
+        """Lägg till många kategorier i en transaktion, befintliga hoppas över
+
+        Returnerar antalet nya kategorier.
+        """
+        with self.transaktion() as cur:
+            cur.executemany(
+                "INSERT OR IGNORE INTO kategorier (namn) VALUES (?)",
+                [(namn,) for namn in namn_lista]
+            )
+        self._ogiltigforklara('kategorier', 'statistik')
+        return cur.rowcount
 
     def lagg_till_standardplatser(self):
         """Lägg till standardförvaringplatser"""
@@ -194,58 +729,75 @@ class MuseumDB:
             ("Magasin B", None, None),
         ]
 
-        for plats in standardplatser:
-            try:
-                self.cursor.execute(
-                    "INSERT INTO platser (byggnad, rum, hylla_sektion) VALUES (?, ?, ?)",
-                    plats
-                )
-            except sqlite3.IntegrityError:
-                pass
+        # Bara om inga platser finns, annars skulle de läggas till igen
+        if self.cursor.execute("SELECT 1 FROM platser LIMIT 1").fetchone() is not None:
+            return
 
-        self.conn.commit()
+        with self.transaktion() as cur:
+            cur.executemany(
+                self._SQL_NY_PLATS,
+                standardplatser
+            )
+        self._ogiltigforklara('platser')
+        self.cursor.execute("ANALYZE")
 
+    @_cachad('kategorier')
     def hamta_kategorier(self):
         """Hämta alla kategorier"""
-        self.cursor.execute("SELECT id, namn FROM kategorier ORDER BY namn")
-        return self.cursor.fetchall()
+        with self.pool.hamta() as cur:
+            cur.execute("SELECT id, namn FROM kategorier ORDER BY namn")
+            return cur.fetchall()
 
+    @_cachad('platser')
     def hamta_platser(self):
         """Hämta alla platser"""
-        self.cursor.execute("""
-            SELECT id, byggnad, rum, hylla_sektion
-            FROM platser
-            ORDER BY byggnad, rum
-        """)
-        return self.cursor.fetchall()
-
+        with self.pool.hamta() as cur:
+            cur.execute("""
+                SELECT id, byggnad, rum, hylla_sektion, visningsnamn
+                FROM platser
+                ORDER BY byggnad, rum
+            """)
+            return cur.fetchall()
+
+    @_cachad('givare')
     def hamta_givare(self):
         """Hämta alla givare (endast id och namn)"""
-        self.cursor.execute("SELECT id, namn FROM givare ORDER BY namn")
-        return self.cursor.fetchall()
+        with self.pool.hamta() as cur:
+            cur.execute("SELECT id, namn FROM givare ORDER BY namn")
+            return cur.fetchall()
 
     def hamta_alla_givare_detaljerat(self):
         """Hämta alla givare med fullständig information"""
-        self.cursor.execute("""
-            SELECT id, namn, adress, telefon, epost, anteckningar
-            FROM givare
-            ORDER BY namn
-        """)
-        return self.cursor.fetchall()
+        with self.pool.hamta() as cur:
+            cur.execute("""
+                SELECT id, namn, adress, telefon, epost, anteckningar
+                FROM givare
+                ORDER BY namn
+            """)
+            return cur.fetchall()
+
+    _SQL_NYTT_FOREMAL = """
+        INSERT INTO foremal (
+            accessionsnummer, namn, beskrivning, kategori_id, material,
+            tillverkningsar, tillverkningsplats, tillverkare,
+            matt_langd, matt_bredd, matt_hojd, vikt, skick,
+            placering_id, datum_registrerat, registrerad_av
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
 
     def lagg_till_foremal(self, data):
         """Lägg till nytt föremål"""
-        query = """
-            INSERT INTO foremal (
-                accessionsnummer, namn, beskrivning, kategori_id, material,
-                tillverkningsar, tillverkningsplats, tillverkare,
-                matt_langd, matt_bredd, matt_hojd, vikt, skick,
-                placering_id, datum_registrerat, registrerad_av
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        self.cursor.execute(query, data)
-        self.conn.commit()
-        return self.cursor.lastrowid
+        with self.transaktion() as cur:
+            cur.execute(self._SQL_NYTT_FOREMAL, data)
+        self._ogiltigforklara('statistik')
+        return cur.lastrowid
+
+    def lagg_till_foremal_batch(self, data_lista):
+        """Lägg till många föremål i en enda transaktion, returnerar antalet"""
+        with self.transaktion() as cur:
+            cur.executemany(self._SQL_NYTT_FOREMAL, data_lista)
+        self._ogiltigforklara('statistik')
+        return cur.rowcount
 
     def uppdatera_foremal(self, foremal_id, data):
         """Uppdatera ett befintligt föremål"""
@@ -268,174 +820,393 @@ class MuseumDB:
                 registrerad_av = ?
             WHERE id = ?
         """
-        self.cursor.execute(query, (*data, foremal_id))
-        self.conn.commit()
+        with self.transaktion() as cur:
+            cur.execute(query, (*data, foremal_id))
+        self._ogiltigforklara('statistik')
+
+    # Sökfrågan har alltid samma text så att den förberedda satsen återanvänds,
+    # tomma villkor (NULL) slås av direkt i frågan
+    _SQL_SOK_BAS = """
+        SELECT f.*, k.namn as kategori_namn, p.byggnad, p.rum
+        FROM foremal f
+        LEFT JOIN kategorier k ON f.kategori_id = k.id
+        LEFT JOIN platser p ON f.placering_id = p.id
+        WHERE ({sokvillkor})
+          AND (?2 IS NULL OR f.kategori_id = ?2)
+        ORDER BY f.accessionsnummer DESC
+    """
+    _SQL_SOK_FTS = _SQL_SOK_BAS.format(sokvillkor=
+        "?1 IS NULL OR f.id IN (SELECT rowid FROM foremal_fts WHERE foremal_fts MATCH ?1)")
+    _SQL_SOK_LIKE = _SQL_SOK_BAS.format(sokvillkor=
+        "?1 IS NULL OR f.namn LIKE ?1 OR f.beskrivning LIKE ?1 OR f.accessionsnummer LIKE ?1")
+
+    def _sokfraga(self, sokterm, kategori_id):
+        """Välj sökfråga och parametrar för sok_foremal"""
+        sokterm = sokterm.strip() if sokterm else ""
+        if not sokterm:
+            return self._SQL_SOK_FTS if self.fts_aktiv else self._SQL_SOK_LIKE, (None, kategori_id or None)
+        if self.fts_aktiv:
+            fraga = self.fulltextfraga(sokterm)
+            if fraga is not None:
+                return self._SQL_SOK_FTS, (fraga, kategori_id or None)
+        # Utan index, eller med för korta sökord, söks hela termen med LIKE
+        return self._SQL_SOK_LIKE, (f"%{sokterm}%", kategori_id or None)
 
     def sok_foremal(self, sokterm="", kategori_id=None):
         """Sök efter föremål"""
-        query = """
-            SELECT f.*, k.namn as kategori_namn, p.byggnad, p.rum
-            FROM foremal f
-            LEFT JOIN kategorier k ON f.kategori_id = k.id
-            LEFT JOIN platser p ON f.placering_id = p.id
-            WHERE 1=1
-        """
-        params = []
-
-        if sokterm:
-            query += " AND (f.namn LIKE ? OR f.beskrivning LIKE ? OR f.accessionsnummer LIKE ?)"
-            sokterm_wildcard = f"%{sokterm}%"
-            params.extend([sokterm_wildcard, sokterm_wildcard, sokterm_wildcard])
-
-        if kategori_id:
-            query += " AND f.kategori_id = ?"
-            params.append(kategori_id)
-
-        query += " ORDER BY f.accessionsnummer DESC"
-
-        self.cursor.execute(query, params)
-        return self.cursor.fetchall()
+        with self.pool.hamta() as cur:
+            cur.execute(*self._sokfraga(sokterm, kategori_id))
+            return cur.fetchall()
+
+    def sok_foremal_i_omgangar(self, sokterm="", kategori_id=None, storlek=100):
+        """Sök efter föremål och lämna resultatet i listor om högst storlek rader"""
+        with self.pool.hamta() as cur:
+            cur.execute(*self._sokfraga(sokterm, kategori_id))
+            while rader := cur.fetchmany(storlek):
+                yield rader
+
+    def hamta_kategori_id(self, namn):
+        """Hämta id för kategorin med ett visst namn, None om den inte finns"""
+        if not namn:
+            return None
+        with self.pool.hamta() as cur:
+            # namn är UNIQUE och har därmed redan ett index
+            rad = cur.execute("SELECT id FROM kategorier WHERE namn = ?", (namn,)).fetchone()
+        return rad.id if rad else None
+
+    def hamta_plats_id(self, plats_text):
+        """Hämta id för platsen som visas som "byggnad - rum - hylla", None om den inte finns"""
+        if not plats_text:
+            return None
+        with self.pool.hamta() as cur:
+            rad = cur.execute("""
+                SELECT id FROM platser
+                WHERE visningsnamn = ?
+                ORDER BY byggnad, rum
+                LIMIT 1
+            """, (plats_text,)).fetchone()
+        return rad.id if rad else None
+
+    def hogsta_accessionsnummer(self, ar):
+        """Hämta högsta löpnumret bland accessionsnummer "ÅR.NNN", 0 om inga finns"""
+        prefix = f"{ar}."
+        with self.pool.hamta() as cur:
+            # GLOB (skiftlägeskänslig) kan använda indexet på accessionsnummer
+            cur.execute("""
+                SELECT MAX(CAST(substr(accessionsnummer, ?) AS INTEGER))
+                FROM foremal
+                WHERE accessionsnummer GLOB ?
+            """, (len(prefix) + 1, f"{prefix}[0-9]*"))
+            return cur.fetchone()[0] or 0
+
+    _SQL_FOREMAL = """
+        SELECT f.*, k.namn as kategori_namn, p.byggnad, p.rum, p.hylla_sektion
+        FROM foremal f
+        LEFT JOIN kategorier k ON f.kategori_id = k.id
+        LEFT JOIN platser p ON f.placering_id = p.id
+    """
+
+    # Högst så många ?-parametrar per fråga (äldre SQLite tillåter 999)
+    _MAX_PARAMETRAR = 500
 
     def hamta_foremal(self, foremal_id):
         """Hämta ett specifikt föremål"""
-        self.cursor.execute("""
-            SELECT f.*, k.namn as kategori_namn, p.byggnad, p.rum, p.hylla_sektion
-            FROM foremal f
-            LEFT JOIN kategorier k ON f.kategori_id = k.id
-            LEFT JOIN platser p ON f.placering_id = p.id
-            WHERE f.id = ?
-        """, (foremal_id,))
-        return self.cursor.fetchone()
+        with self.pool.hamta() as cur:
+            cur.execute(self._SQL_FOREMAL + "WHERE f.id = ?", (foremal_id,))
+            return cur.fetchone()
+
+    def hamta_foremal_batch(self, foremal_ids):
+        """Hämta många föremål med några få frågor, returnerar dict id -> föremål"""
+        foremal_ids = list(foremal_ids)
+        resultat = {}
+        with self.pool.hamta() as cur:
+            for start in range(0, len(foremal_ids), self._MAX_PARAMETRAR):
+                omgang = foremal_ids[start:start + self._MAX_PARAMETRAR]
+                platshallare = ", ".join("?" * len(omgang))
+                cur.execute(self._SQL_FOREMAL + f"WHERE f.id IN ({platshallare})", omgang)
+                for foremal in cur:
+                    resultat[foremal.id] = foremal
+        return resultat
+
+    _SQL_FOREMAL_MED_FOTON = """
+        SELECT f.*, k.namn as kategori_namn, p.byggnad, p.rum, p.hylla_sektion,
+               fo.id IS NOT NULL AS har_foto, fo.*
+        FROM foremal f
+        LEFT JOIN kategorier k ON f.kategori_id = k.id
+        LEFT JOIN platser p ON f.placering_id = p.id
+        LEFT JOIN foton fo ON fo.foremal_id = f.id
+        WHERE f.id = ?
+        ORDER BY fo.datum DESC
+    """
+
+    def hamta_foremal_med_foton(self, foremal_id):
+        """Hämta ett föremål och dess foton med en fråga, returnerar (föremål, foton)
+
+        Föremålet är None om det inte finns. Raderna har samma typ som från
+        hamta_foremal och hamta_foton, och fotona sparas i fotocachen.
+        """
+        if foremal_id in self._foton_cache:
+            return self.hamta_foremal(foremal_id), self.hamta_foton(foremal_id)
+
+        with self.pool.hamta() as cur:
+            cur.row_factory = None  # Raden delas upp i föremål och foto nedan
+            rader = cur.execute(self._SQL_FOREMAL_MED_FOTON, (foremal_id,)).fetchall()
+            kolumner = tuple(kol[0] for kol in cur.description)
+        if not rader:
+            return None, ()
+
+        # Fotokolumnerna (fo.*) kommer efter har_foto, en rad per foto (eller en rad utan foto)
+        delning = kolumner.index('har_foto')
+        foremal = tuple.__new__(radtyp(kolumner[:delning]), rader[0][:delning])
+        fototyp = radtyp(kolumner[delning + 1:])
+        foton = tuple(tuple.__new__(fototyp, rad[delning + 1:]) for rad in rader if rad[delning])
+        self._spara_foton_cache(foremal_id, foton)
+        return foremal, foton
 
     def lagg_till_kategori(self, namn):
         """Lägg till ny kategori"""
-        self.cursor.execute("INSERT INTO kategorier (namn) VALUES (?)", (namn,))
-        self.conn.commit()
-        return self.cursor.lastrowid
+        with self.transaktion() as cur:
+            cur.execute("INSERT INTO kategorier (namn) VALUES (?)", (namn,))
+        self._ogiltigforklara('kategorier', 'statistik')
+        return cur.lastrowid
 
     def lagg_till_plats(self, byggnad, rum, hylla):
         """Lägg till ny plats"""
-        self.cursor.execute(
-            "INSERT INTO platser (byggnad, rum, hylla_sektion) VALUES (?, ?, ?)",
-            (byggnad, rum, hylla)
-        )
-        self.conn.commit()
-        return self.cursor.lastrowid
+        with self.transaktion() as cur:
+            cur.execute(
+                self._SQL_NY_PLATS,
+                (byggnad, rum, hylla)
+            )
+        self._ogiltigforklara('platser')
+        return cur.lastrowid
+
+    def rakna_foremal_pa_plats(self, plats_id):
+        """Räkna föremål som står på en plats (använder indexet idx_foremal_placering)"""
+        with self.pool.hamta() as cur:
+            cur.execute("SELECT COUNT(*) FROM foremal WHERE placering_id = ?", (plats_id,))
+            return cur.fetchone()[0]
 
     def ta_bort_plats(self, plats_id):
         """Ta bort en plats (sätter placering_id till NULL för föremål som använder platsen)"""
-        self.cursor.execute("DELETE FROM platser WHERE id = ?", (plats_id,))
-        self.conn.commit()
+        with self.transaktion() as cur:
+            cur.execute("DELETE FROM platser WHERE id = ?", (plats_id,))
+        self._ogiltigforklara('platser')
 
     def ta_bort_foremal(self, foremal_id):
         """Ta bort ett föremål och alla dess relaterade data"""
-        # Ta bort kopplingar till givare
-        self.cursor.execute("DELETE FROM foremal_givare WHERE foremal_id = ?", (foremal_id,))
-
-        # Ta bort kopplingar till utställningar
-        self.cursor.execute("DELETE FROM foremal_utstallning WHERE foremal_id = ?", (foremal_id,))
+        with self.transaktion() as cur:
+            # Ta bort kopplingar till givare
+            cur.execute("DELETE FROM foremal_givare WHERE foremal_id = ?", (foremal_id,))
 
-        # Ta bort konserveringshistorik
-        self.cursor.execute("DELETE FROM konservering WHERE foremal_id = ?", (foremal_id,))
+            # Ta bort kopplingar till utställningar
+            cur.execute("DELETE FROM foremal_utstallning WHERE foremal_id = ?", (foremal_id,))
 
-        # Hämta och ta bort foton (returnerar fotoposter för filborttagning)
-        self.cursor.execute("SELECT filsokvag FROM foton WHERE foremal_id = ?", (foremal_id,))
-        foton = self.cursor.fetchall()
-        self.cursor.execute("DELETE FROM foton WHERE foremal_id = ?", (foremal_id,))
+            # Ta bort konserveringshistorik
+            cur.execute("DELETE FROM konservering WHERE foremal_id = ?", (foremal_id,))
 
-        # Ta bort själva föremålet
-        self.cursor.execute("DELETE FROM foremal WHERE id = ?", (foremal_id,))
+            # Hämta och ta bort foton (returnerar fotoposter för filborttagning)
+            cur.execute("SELECT filsokvag, miniatyr_sokvag FROM foton WHERE foremal_id = ?", (foremal_id,))
+            foton = cur.fetchall()
+            cur.execute("DELETE FROM foton WHERE foremal_id = ?", (foremal_id,))
 
-        self.conn.commit()
+            # Ta bort själva föremålet
+            cur.execute("DELETE FROM foremal WHERE id = ?", (foremal_id,))
+        self._foton_cache.pop(foremal_id, None)
+        self._ogiltigforklara('statistik')
 
-        # Returnera fotosökvägar för filborttagning
-        return [foto['filsokvag'] for foto in foton]
+        # Returnera (bild, miniatyr) för filborttagning, se ta_bort_bild
+        return [(foto['filsokvag'], foto['miniatyr_sokvag']) for foto in foton]
 
     def lagg_till_givare(self, namn, adress, telefon, epost, anteckningar):
         """Lägg till ny givare"""
-        self.cursor.execute(
-            "INSERT INTO givare (namn, adress, telefon, epost, anteckningar) VALUES (?, ?, ?, ?, ?)",
-            (namn, adress, telefon, epost, anteckningar)
-        )
-        self.conn.commit()
-        return self.cursor.lastrowid
+        with self.transaktion() as cur:
+            cur.execute(
+                "INSERT INTO givare (namn, adress, telefon, epost, anteckningar) VALUES (?, ?, ?, ?, ?)",
+                (namn, adress, telefon, epost, anteckningar)
+            )
+        self._ogiltigforklara('givare')
+        return cur.lastrowid
 
     def koppla_foremal_givare(self, foremal_id, givare_id, gavodatum, forvarvstyp, anteckningar):
         """Koppla föremål till givare"""
-        self.cursor.execute(
-            """INSERT INTO foremal_givare
-               (foremal_id, givare_id, gavodatum, forvarvstyp, anteckningar)
-               VALUES (?, ?, ?, ?, ?)""",
-            (foremal_id, givare_id, gavodatum, forvarvstyp, anteckningar)
-        )
-        self.conn.commit()
+        with self.transaktion() as cur:
+            cur.execute(
+                """INSERT INTO foremal_givare
+                   (foremal_id, givare_id, gavodatum, forvarvstyp, anteckningar)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (foremal_id, givare_id, gavodatum, forvarvstyp, anteckningar)
+            )
 
     def lagg_till_foto(self, foremal_id, filsokvag, beskrivning=None, fotograf=None):
         """Lägg till ett foto för ett föremål"""
         datum = datetime.now().strftime("%Y-%m-%d")
-        self.cursor.execute(
-            """INSERT INTO foton (foremal_id, filsokvag, beskrivning, fotograf, datum)
-               VALUES (?, ?, ?, ?, ?)""",
-            (foremal_id, filsokvag, beskrivning, fotograf, datum)
-        )
-        self.conn.commit()
-        return self.cursor.lastrowid
+        with self.transaktion() as cur:
+            cur.execute(
+                """INSERT INTO foton (foremal_id, filsokvag, beskrivning, fotograf, datum)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (foremal_id, filsokvag, beskrivning, fotograf, datum)
+            )
+        self._foton_cache.pop(foremal_id, None)
+        return cur.lastrowid
+
+    def lagg_till_foton_batch(self, foremal_id, filsokvagar, miniatyrer=None):
+        """Lägg till flera foton för ett föremål i en transaktion
+
+        miniatyrer är en lista med miniatyrsökvägar (eller None) i samma ordning som filsokvagar.
+        """
+        datum = datetime.now().strftime("%Y-%m-%d")
+        if miniatyrer is None:
+            miniatyrer = [None] * len(filsokvagar)
+        with self.transaktion() as cur:
+            cur.executemany(
+                """INSERT INTO foton (foremal_id, filsokvag, datum, miniatyr_sokvag)
+                   VALUES (?, ?, ?, ?)""",
+                [(foremal_id, filsokvag, datum, miniatyr)
+                 for filsokvag, miniatyr in zip(filsokvagar, miniatyrer)]
+            )
+        self._foton_cache.pop(foremal_id, None)
+
+    # Antal föremål vars foton hålls i minnet
+    _FOTON_CACHE_STORLEK = 256
 
     def hamta_foton(self, foremal_id):
-        """Hämta alla foton för ett föremål"""
-        self.cursor.execute(
-            "SELECT * FROM foton WHERE foremal_id = ? ORDER BY datum DESC",
-            (foremal_id,)
-        )
-        return self.cursor.fetchall()
+        """Hämta alla foton för ett föremål
+
+        Resultatet sparas i _foton_cache tills fotona för föremålet ändras,
+        så att ett föremål som öppnas igen inte behöver läsas från databasen.
+        """
+        try:
+            foton = self._foton_cache.pop(foremal_id)
+        except KeyError:
+            with self.pool.hamta() as cur:
+                cur.execute(
+                    "SELECT * FROM foton WHERE foremal_id = ? ORDER BY datum DESC",
+                    (foremal_id,)
+                )
+                foton = tuple(cur.fetchall())
+        self._spara_foton_cache(foremal_id, foton)
+        return foton
+
+    def _spara_foton_cache(self, foremal_id, foton):
+        """Lägg foton sist i fotocachen och släng de äldsta om den blivit för stor"""
+        if self._transaktionsdjup:
+            return  # Läsanslutningen ser inte ändringar som inte committats än
+        self._foton_cache[foremal_id] = foton
+        if len(self._foton_cache) > self._FOTON_CACHE_STORLEK:
+            del self._foton_cache[next(iter(self._foton_cache))]
+
+    def uppdatera_miniatyr(self, foto_id, miniatyr_sokvag):
+        """Spara sökvägen till ett fotos miniatyr"""
+        with self.transaktion() as cur:
+            cur.execute(
+                "UPDATE foton SET miniatyr_sokvag = ? WHERE id = ?",
+                (miniatyr_sokvag, foto_id)
+            )
+        # Bara foto-id är känt här, så hela fotocachen töms
+        self._foton_cache.clear()
 
     def ta_bort_foto(self, foto_id):
         """Ta bort ett foto från databasen"""
-        self.cursor.execute("DELETE FROM foton WHERE id = ?", (foto_id,))
-        self.conn.commit()
+        with self.transaktion() as cur:
+            cur.execute("DELETE FROM foton WHERE id = ?", (foto_id,))
+        self._foton_cache.clear()
+
+    # Frågorna för statistiken hålls konstanta så att SQLite kan återanvända dem
+    _SQL_STATISTIK_TOTALT = "SELECT COUNT(*) FROM foremal"
+    _SQL_STATISTIK_PER_KATEGORI = """
+        SELECT k.namn, COALESCE(s.antal, 0) as antal
+        FROM kategorier k
+        LEFT JOIN kategori_statistik s ON s.kategori_id = k.id
+        ORDER BY antal DESC, k.id
+    """
+    _SQL_STATISTIK_SENASTE = """
+        SELECT accessionsnummer, namn, datum_registrerat
+        FROM foremal
+        ORDER BY datum_registrerat DESC
+        LIMIT 10
+    """
+
+    def _spara_i_cache(self, nyckel, varde, version):
+        """Spara varde i _cache, om inget ogiltigförklarats sedan hämtningen började (version)"""
+        with self._cache_las:
+            if version == self._cache_version:
+                self._cache[nyckel] = varde
+
+    def _ogiltigforklara(self, *nycklar):
+        """Ta bort nycklar ur _cache efter en ändring i databasen
+
+        Inne i en transaktion väntar det tills den yttersta har committat. Annars
+        kunde en läsning som startar innan dess spara den gamla datan under den
+        nya versionen.
+        """
+        if self._transaktionsdjup > 0:
+            self._vantande_ogiltigforklaringar.update(nycklar)
+            return
+        with self._cache_las:
+            self._cache_version += 1
+            for nyckel in nycklar:
+                self._cache.pop(nyckel, None)
 
-    def hamta_statistik(self):
-        """Hämta statistik om samlingen"""
-        stats = {}
+    def hamta_statistik(self, anvand_cache=True):
+        """Hämta statistik om samlingen
+
+        Resultatet sparas i _cache tills föremål eller kategorier ändras,
+        anvand_cache=False läser alltid om från databasen.
+        """
+        if anvand_cache and 'statistik' in self._cache:
+            return self._cache['statistik']
 
-        # Total antal föremål
-        self.cursor.execute("SELECT COUNT(*) FROM foremal")
-        stats['totalt'] = self.cursor.fetchone()[0]
+        version = self._cache_version
+        stats = {}
+        with self.pool.hamta() as cur:
+            # Total antal föremål
+            stats['totalt'] = cur.execute(self._SQL_STATISTIK_TOTALT).fetchone()[0]
 
-        # Antal per kategori
-        self.cursor.execute("""
-            SELECT k.namn, COUNT(f.id) as antal
-            FROM kategorier k
-            LEFT JOIN foremal f ON k.id = f.kategori_id
-            GROUP BY k.id, k.namn
-            ORDER BY antal DESC
-        """)
-        stats['per_kategori'] = self.cursor.fetchall()
+            # Antal per kategori (underhålls av triggers, se skapa_kategoristatistik)
+            stats['per_kategori'] = tuple(cur.execute(self._SQL_STATISTIK_PER_KATEGORI))
 
-        # Senaste registreringarna
-        self.cursor.execute("""
-            SELECT accessionsnummer, namn, datum_registrerat
-            FROM foremal
-            ORDER BY datum_registrerat DESC
-            LIMIT 10
-        """)
-        stats['senaste'] = self.cursor.fetchall()
+            # Senaste registreringarna
+            stats['senaste'] = tuple(cur.execute(self._SQL_STATISTIK_SENASTE))
 
+        stats['hamtad'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._spara_i_cache('statistik', stats, version)
         return stats
 
+    def backup(self, mal_sokvag, progress=None, sidor=-1):
+        """Kopiera databasen till mal_sokvag med SQLites backup-API
+
+        Kopian blir konsistent även om databasen skrivs samtidigt och
+        innehåller det som ligger i WAL-loggen, utan checkpoint först.
+        Med sidor > 0 kopieras så många sidor åt gången och
+        progress(status, kvar, totalt) anropas efter varje omgång.
+
+        Läser via en egen anslutning, så metoden kan köras i en bakgrundstråd.
+        """
+        kalla = sqlite3.connect(self.db_path)
+        mal = sqlite3.connect(mal_sokvag)
+        try:
+            kalla.backup(mal, pages=sidor, progress=progress)
+        finally:
+            mal.close()
+            kalla.close()
+
+    def optimera(self):
+        """Uppdatera statistik för frågeplaneraren och komprimera databasfilen"""
+        self.conn.commit()
+        self.cursor.execute("ANALYZE")
+        self.cursor.execute("PRAGMA optimize")
+        self.cursor.execute("VACUUM")
+
     def stang(self):
         """Stäng databasanslutningen"""
+        self.pool.stang()
         if self.conn:
+            self.cursor.execute("PRAGMA optimize")
             self.conn.close()
 
 
-class PrintManager:
-    """Hanterar utskriftsfunktioner"""
-
-    @staticmethod
-    def generera_html_header():
-        """Generera HTML-header med styling"""
-        return """<!DOCTYPE html>
+# Början och slut på alla utskrifter, färdigkodade så att de kan skrivas direkt till filen
+_HTML_HEADER = """<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
@@ -497,39 +1268,138 @@ class PrintManager:
     </style>
 </head>
 <body>
-"""
+""".encode('utf-8')
 
-    @staticmethod
-    def generera_html_footer():
-        """Generera HTML-footer"""
-        datum = datetime.now().strftime("%Y-%m-%d %H:%M")
-        return f"""
+_HTML_FOOTER_FORE = """
     <div class="footer">
-        <p>Hembygdsmuseum - Utskrivet {datum}</p>
+        <p>Hembygdsmuseum - Utskrivet """.encode('utf-8')
+
+_HTML_FOOTER_EFTER = """</p>
     </div>
 </body>
 </html>
+""".encode('utf-8')
+
+# Tabellrader i listutskrifterna, fylls i med format (värdena HTML-skyddas först)
+_RAD_FOREMALSLISTA = """
+        <tr>
+            <td>{accessionsnummer}</td>
+            <td>{namn}</td>
+            <td>{kategori}</td>
+            <td>{material}</td>
+            <td>{plats}</td>
+        </tr>
 """
+_RAD_STATISTIK_KATEGORI = """
+        <tr>
+            <td>{kategori}</td>
+            <td>{antal}</td>
+        </tr>
+"""
+_RAD_STATISTIK_SENASTE = """
+        <tr>
+            <td>{accessionsnummer}</td>
+            <td>{namn}</td>
+            <td>{datum}</td>
+        </tr>
+"""
+_RAD_PLATSLISTA = """
+        <tr>
+            <td>{byggnad}</td>
+            <td>{rum}</td>
+            <td>{hylla}</td>
+        </tr>
+"""
+_RAD_KATEGORILISTA = """
+        <tr>
+            <td>{namn}</td>
+        </tr>
+"""
+_RAD_GIVARLISTA = """
+        <tr>
+            <td>{namn}</td>
+            <td>{adress}</td>
+            <td>{telefon}</td>
+            <td>{epost}</td>
+            <td>{anteckningar}</td>
+        </tr>
+"""
+
+
+class PrintManager:
+    """Hanterar utskriftsfunktioner"""
+
+    # Bild i en utskrift: länkas in bredvid HTML-filen eller bäddas in som data-URI.
+    # Alla bilder är JPEG (original eller miniatyr), så typen är alltid image/jpeg.
+    Bildfil = namedtuple('Bildfil', ['sokvag'])
+
+    @staticmethod
+    def generera_html_footer():
+        """Generera HTML-footer, bara tidsstämpeln formateras vid anrop"""
+        datum = datetime.now().strftime("%Y-%m-%d %H:%M")
+        return _HTML_FOOTER_FORE + datum.encode('ascii') + _HTML_FOOTER_EFTER
+
+    @staticmethod
+    def skriv_html(html_innehall, f, bildkatalog=None):
+        """Skriv en hel HTML-sida till den binära filen f
+
+        html_innehall kan vara en sträng eller en iterator av delar. Delar av
+        typen Bildfil länkas (eller kopieras) till bildkatalog och refereras
+        med filnamn; utan bildkatalog bäddas de in som data-URI så att filen
+        blir fristående.
+        """
+        if isinstance(html_innehall, str):
+            html_innehall = (html_innehall,)
+
+        f.write(_HTML_HEADER)
+        antal_bilder = 0
+        for del_ in html_innehall:
+            if not isinstance(del_, PrintManager.Bildfil):
+                f.write(del_.encode('utf-8'))
+            elif bildkatalog is None:
+                f.write(b"data:image/jpeg;base64,")
+                # Koda i bitar (multipel av 3 byte) så att hela bilden aldrig läses in på en gång
+                with open(del_.sokvag, 'rb') as bildfil:
+                    while bit := bildfil.read(3 * 16384):
+                        f.write(base64.b64encode(bit))
+            else:
+                antal_bilder += 1
+                filnamn = f"bild_{antal_bilder}.jpg"
+                try:
+                    os.link(del_.sokvag, bildkatalog / filnamn)
+                except OSError:
+                    # Annat filsystem eller ingen stöd för hårda länkar
+                    shutil.copyfile(del_.sokvag, bildkatalog / filnamn)
+                f.write(filnamn.encode('ascii'))
+        f.write(PrintManager.generera_html_footer())
 
     @staticmethod
     def visa_utskrift(html_innehall, titel="Utskrift"):
-        """Öppna utskrift i webbläsare"""
-        # Skapa temporär HTML-fil
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as f:
-            f.write(PrintManager.generera_html_header())
-            f.write(html_innehall)
-            f.write(PrintManager.generera_html_footer())
-            temp_path = f.name
+        """Öppna utskrift i webbläsare
+
+        Sidan skrivs till en temporär katalog tillsammans med bilderna, så att
+        webbläsaren kan läsa in bilderna som vanliga filer.
+        """
+        katalog = Path(tempfile.mkdtemp(prefix="hembygdsmuseum_"))
+        html_fil = katalog / "utskrift.html"
+        with open(html_fil, 'wb') as f:
+            PrintManager.skriv_html(html_innehall, f, bildkatalog=katalog)
 
         # Öppna i webbläsare
-        webbrowser.open('file://' + temp_path)
+        webbrowser.open(html_fil.resolve().as_uri())
         messagebox.showinfo("Utskrift",
                            "Utskrift öppnad i webbläsare.\n\n"
                            "Använd webbläsarens utskriftsfunktion (Ctrl+P / Cmd+P) för att skriva ut.")
 
+    @staticmethod
+    def exportera_html(html_innehall, filsokvag):
+        """Spara utskriften som en fristående HTML-fil med inbäddade bilder"""
+        with open(filsokvag, 'wb') as f:
+            PrintManager.skriv_html(html_innehall, f)
+
     @staticmethod
     def skriv_ut_foremal(foremal, foton=None):
-        """Generera HTML för ett föremål"""
+        """Generera HTML för ett föremål (som en ström av delar)"""
         def format_matt(l, b, h):
             matt = []
             if l: matt.append(f"{l}")
@@ -537,109 +1407,113 @@ class PrintManager:
             if h: matt.append(f"{h}")
             return " × ".join(matt) + " cm" if matt else "Ej angivet"
 
-        def bild_till_base64(bildsokvag):
-            """Konvertera bild till base64 för inbäddning i HTML"""
+        def bild_till_fil(foto):
+            """Välj bildfil för utskrift (max 800px), returnerar en Bildfil"""
+            bildsokvag = foto['filsokvag']
             try:
                 if os.path.exists(bildsokvag):
-                    # Öppna och skala ner bild för bättre prestanda
-                    img = Image.open(bildsokvag)
-                    # Skala ner till max 800px bred
-                    max_width = 800
-                    if img.width > max_width:
-                        ratio = max_width / img.width
-                        new_height = int(img.height * ratio)
-                        img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
-
-                    # Konvertera till bytes
-                    import io
-                    buffer = io.BytesIO()
-                    img_format = img.format if img.format else 'JPEG'
-                    img.save(buffer, format=img_format)
-                    img_bytes = buffer.getvalue()
-
-                    # Konvertera till base64
-                    img_base64 = base64.b64encode(img_bytes).decode('utf-8')
-                    mime_type = f"image/{img_format.lower()}"
-                    return f"data:{mime_type};base64,{img_base64}"
+                    max_storlek = 800
+                    with Image.open(bildsokvag) as img:
+                        img_format = img.format
+                        liten = max(img.size) <= max_storlek
+
+                    # Små JPEG används direkt från disk utan omkodning
+                    if img_format == 'JPEG' and liten:
+                        return PrintManager.Bildfil(bildsokvag)
+
+                    # Annars används den sparade miniatyren (alltid JPEG)
+                    miniatyr = foto['miniatyr_sokvag']
+                    if not (miniatyr and os.path.exists(miniatyr)):
+                        miniatyr = skapa_miniatyr(bildsokvag, max_storlek)
+                    if miniatyr:
+                        return PrintManager.Bildfil(miniatyr)
             except Exception as e:
                 print(f"Fel vid konvertering av bild: {e}")
             return None
 
-        html = f"""
+        def g(nyckel, standard='Ej angivet'):
+            """Hämta ett fält HTML-kodat, eller standardtexten om det saknas"""
+            varde = foremal[nyckel]
+            return escape(str(varde)) if varde else standard
+
+        vikt = foremal['vikt']
+
+        yield f"""
 <h1>Föremålsinformation</h1>
 
 <div class="info-section">
-    <p><span class="label">ID:</span> {foremal['id']}</p>
-    <p><span class="label">Accessionsnummer:</span> {foremal['accessionsnummer']}</p>
-    <p><span class="label">Namn:</span> {foremal['namn']}</p>
+    <p><span class="label">ID:</span> {g('id', '')}</p>
+    <p><span class="label">Accessionsnummer:</span> {g('accessionsnummer', '')}</p>
+    <p><span class="label">Namn:</span> {g('namn', '')}</p>
 </div>
 
 <h2>Beskrivning</h2>
 <div class="info-section">
-    <p>{foremal['beskrivning'] if foremal['beskrivning'] else 'Ingen beskrivning'}</p>
+    <p>{g('beskrivning', 'Ingen beskrivning')}</p>
 </div>
 """
 
-        # Lägg till bilder om det finns några
+        # Lägg till bilder om det finns några, en bild i taget
         if foton and len(foton) > 0:
-            html += """
+            yield """
 <h2>Bilder</h2>
 <div class="info-section" style="text-align: center;">
 """
             for foto in foton:
-                img_data = bild_till_base64(foto['filsokvag'])
-                if img_data:
-                    filnamn = Path(foto['filsokvag']).name
-                    html += f"""
+                bild = bild_till_fil(foto)
+                if bild:
+                    filnamn = escape(os.path.basename(foto['filsokvag']))
+                    yield """
     <div style="margin: 20px 0; page-break-inside: avoid;">
-        <img src="{img_data}" style="max-width: 100%; height: auto; border: 1px solid #ddd; padding: 5px;">
+        <img src=\""""
+                    yield bild
+                    yield f"""" style="max-width: 100%; height: auto; border: 1px solid #ddd; padding: 5px;">
         <p style="font-size: 0.9em; color: #666; margin-top: 5px;">{filnamn}</p>
     </div>
 """
-            html += """
+            yield """
 </div>
 """
 
-        html += f"""
+        yield f"""
 <h2>Klassificering</h2>
 <div class="info-section">
-    <p><span class="label">Kategori:</span> {foremal['kategori_namn'] if foremal['kategori_namn'] else 'Ej angiven'}</p>
-    <p><span class="label">Material:</span> {foremal['material'] if foremal['material'] else 'Ej angivet'}</p>
+    <p><span class="label">Kategori:</span> {g('kategori_namn', 'Ej angiven')}</p>
+    <p><span class="label">Material:</span> {g('material')}</p>
 </div>
 
 <h2>Tillverkning</h2>
 <div class="info-section">
-    <p><span class="label">År:</span> {foremal['tillverkningsar'] if foremal['tillverkningsar'] else 'Okänt'}</p>
-    <p><span class="label">Plats:</span> {foremal['tillverkningsplats'] if foremal['tillverkningsplats'] else 'Okänd'}</p>
-    <p><span class="label">Tillverkare:</span> {foremal['tillverkare'] if foremal['tillverkare'] else 'Okänd'}</p>
+    <p><span class="label">År:</span> {g('tillverkningsar', 'Okänt')}</p>
+    <p><span class="label">Plats:</span> {g('tillverkningsplats', 'Okänd')}</p>
+    <p><span class="label">Tillverkare:</span> {g('tillverkare', 'Okänd')}</p>
 </div>
 
 <h2>Fysiska egenskaper</h2>
 <div class="info-section">
-    <p><span class="label">Mått (L×B×H):</span> {format_matt(foremal['matt_langd'], foremal['matt_bredd'], foremal['matt_hojd'])}</p>
-    <p><span class="label">Vikt:</span> {foremal['vikt'] if foremal['vikt'] else 'Ej angivet'} {'g' if foremal['vikt'] else ''}</p>
-    <p><span class="label">Skick:</span> {foremal['skick'] if foremal['skick'] else 'Ej angivet'}</p>
+    <p><span class="label">Mått (L×B×H):</span> {format_matt(g('matt_langd', None), g('matt_bredd', None), g('matt_hojd', None))}</p>
+    <p><span class="label">Vikt:</span> {g('vikt')} {'g' if vikt else ''}</p>
+    <p><span class="label">Skick:</span> {g('skick')}</p>
 </div>
 
 <h2>Förvaring</h2>
 <div class="info-section">
-    <p><span class="label">Byggnad:</span> {foremal['byggnad'] if foremal['byggnad'] else 'Ej angiven'}</p>
-    <p><span class="label">Rum:</span> {foremal['rum'] if foremal['rum'] else 'Ej angivet'}</p>
-    <p><span class="label">Hylla/Sektion:</span> {foremal['hylla_sektion'] if foremal['hylla_sektion'] else 'Ej angivet'}</p>
+    <p><span class="label">Byggnad:</span> {g('byggnad', 'Ej angiven')}</p>
+    <p><span class="label">Rum:</span> {g('rum')}</p>
+    <p><span class="label">Hylla/Sektion:</span> {g('hylla_sektion')}</p>
 </div>
 
 <h2>Registrering</h2>
 <div class="info-section">
-    <p><span class="label">Datum:</span> {foremal['datum_registrerat']}</p>
-    <p><span class="label">Registrerad av:</span> {foremal['registrerad_av'] if foremal['registrerad_av'] else 'Okänd'}</p>
+    <p><span class="label">Datum:</span> {g('datum_registrerat', '')}</p>
+    <p><span class="label">Registrerad av:</span> {g('registrerad_av', 'Okänd')}</p>
 </div>
 """
-        return html
 
     @staticmethod
     def skriv_ut_foremalslista(foremalslista):
         """Generera HTML för lista av föremål"""
-        html = f"""
+        delar = [f"""
 <h1>Föremålslista</h1>
 <p>Antal föremål: {len(foremalslista)}</p>
 
@@ -654,31 +1528,26 @@ class PrintManager:
         </tr>
     </thead>
     <tbody>
-"""
-        for foremal in foremalslista:
-            plats_str = foremal['byggnad'] if foremal['byggnad'] else ""
-            if foremal['rum']:
-                plats_str += f" - {foremal['rum']}"
-
-            html += f"""
-        <tr>
-            <td>{foremal['accessionsnummer']}</td>
-            <td>{foremal['namn']}</td>
-            <td>{foremal['kategori_namn'] if foremal['kategori_namn'] else ''}</td>
-            <td>{foremal['material'] if foremal['material'] else ''}</td>
-            <td>{plats_str}</td>
-        </tr>
-"""
-        html += """
+"""]
+        rad = _RAD_FOREMALSLISTA.format
+        delar.extend(
+            rad(accessionsnummer=escape(foremal.accessionsnummer),
+                namn=escape(foremal.namn),
+                kategori=escape(foremal.kategori_namn or ''),
+                material=escape(foremal.material or ''),
+                plats=escape(" - ".join(filter(None, (foremal.byggnad, foremal.rum)))))
+            for foremal in foremalslista
+        )
+        delar.append("""
     </tbody>
 </table>
-"""
-        return html
+""")
+        return "".join(delar)
 
     @staticmethod
     def skriv_ut_statistik(stats):
         """Generera HTML för statistik"""
-        html = f"""
+        delar = [f"""
 <h1>Museistatistik</h1>
 
 <div class="info-section">
@@ -694,16 +1563,13 @@ class PrintManager:
         </tr>
     </thead>
     <tbody>
-"""
-        for kat in stats['per_kategori']:
-            if kat[1] > 0:
-                html += f"""
-        <tr>
-            <td>{kat[0]}</td>
-            <td>{kat[1]}</td>
-        </tr>
-"""
-        html += """
+"""]
+        rad = _RAD_STATISTIK_KATEGORI.format
+        delar.extend(
+            rad(kategori=escape(kategori_namn), antal=antal)
+            for kategori_namn, antal in stats['per_kategori'] if antal > 0
+        )
+        delar.append("""
     </tbody>
 </table>
 
@@ -717,25 +1583,22 @@ class PrintManager:
         </tr>
     </thead>
     <tbody>
-"""
-        for foremal in stats['senaste']:
-            html += f"""
-        <tr>
-            <td>{foremal['accessionsnummer']}</td>
-            <td>{foremal['namn']}</td>
-            <td>{foremal['datum_registrerat']}</td>
-        </tr>
-"""
-        html += """
+""")
+        rad = _RAD_STATISTIK_SENASTE.format
+        delar.extend(
+            rad(accessionsnummer=escape(accessionsnummer), namn=escape(namn), datum=escape(datum_registrerat))
+            for accessionsnummer, namn, datum_registrerat in stats['senaste']
+        )
+        delar.append("""
     </tbody>
 </table>
-"""
-        return html
+""")
+        return "".join(delar)
 
     @staticmethod
     def skriv_ut_platslista(platser):
         """Generera HTML för platslista"""
-        html = f"""
+        delar = [f"""
 <h1>Platslista</h1>
 <p>Antal platser: {len(platser)}</p>
 
@@ -748,25 +1611,24 @@ class PrintManager:
         </tr>
     </thead>
     <tbody>
-"""
-        for plats in platser:
-            html += f"""
-        <tr>
-            <td>{plats['byggnad']}</td>
-            <td>{plats['rum'] if plats['rum'] else '-'}</td>
-            <td>{plats['hylla_sektion'] if plats['hylla_sektion'] else '-'}</td>
-        </tr>
-"""
-        html += """
+"""]
+        rad = _RAD_PLATSLISTA.format
+        delar.extend(
+            rad(byggnad=escape(plats.byggnad),
+                rum=escape(plats.rum or '-'),
+                hylla=escape(plats.hylla_sektion or '-'))
+            for plats in platser
+        )
+        delar.append("""
     </tbody>
 </table>
-"""
-        return html
+""")
+        return "".join(delar)
 
     @staticmethod
     def skriv_ut_kategorilista(kategorier):
         """Generera HTML för kategorilista"""
-        html = f"""
+        delar = [f"""
 <h1>Kategorilista</h1>
 <p>Antal kategorier: {len(kategorier)}</p>
 
@@ -777,23 +1639,19 @@ class PrintManager:
         </tr>
     </thead>
     <tbody>
-"""
-        for kat in kategorier:
-            html += f"""
-        <tr>
-            <td>{kat['namn']}</td>
-        </tr>
-"""
-        html += """
+"""]
+        rad = _RAD_KATEGORILISTA.format
+        delar.extend(rad(namn=escape(kat.namn)) for kat in kategorier)
+        delar.append("""
     </tbody>
 </table>
-"""
-        return html
+""")
+        return "".join(delar)
 
     @staticmethod
     def skriv_ut_givarlista(givare):
         """Generera HTML för givarlista"""
-        html = f"""
+        delar = [f"""
 <h1>Givarlista</h1>
 <p>Antal givare: {len(givare)}</p>
 
@@ -808,22 +1666,87 @@ class PrintManager:
         </tr>
     </thead>
     <tbody>
-"""
-        for givare_rad in givare:
-            html += f"""
-        <tr>
-            <td>{givare_rad['namn']}</td>
-            <td>{givare_rad['adress'] if givare_rad['adress'] else '-'}</td>
-            <td>{givare_rad['telefon'] if givare_rad['telefon'] else '-'}</td>
-            <td>{givare_rad['epost'] if givare_rad['epost'] else '-'}</td>
-            <td>{givare_rad['anteckningar'] if givare_rad['anteckningar'] else '-'}</td>
-        </tr>
-"""
-        html += """
+"""]
+        rad = _RAD_GIVARLISTA.format
+        delar.extend(
+            rad(namn=escape(givare_rad.namn),
+                adress=escape(givare_rad.adress or '-'),
+                telefon=escape(givare_rad.telefon or '-'),
+                epost=escape(givare_rad.epost or '-'),
+                anteckningar=escape(givare_rad.anteckningar or '-'))
+            for givare_rad in givare
+        )
+        delar.append("""
     </tbody>
 </table>
+""")
+        return "".join(delar)
+
+
+# Tecken som har särskild betydelse i ett Tcl-ord och måste skyddas med backslash
+_TCL_SPECIALTECKEN = str.maketrans({
+    **{tecken: "\\" + tecken for tecken in ' \\{}[]$";'},
+    "\n": "\\n", "\r": "\\r", "\t": "\\t",
+})
+
+
+def _tcl_ord(varde):
+    """Gör om ett värde till ett enskilt Tcl-ord, för skript som körs med tk.eval"""
+    text = str(varde)
+    return text.translate(_TCL_SPECIALTECKEN) if text else "{}"
+
+
+# Mall för detaljvyn, fylls i med format_map (se visa_foremal_detaljer)
+_DETALJ_MALL = """
+╔══════════════════════════════════════════════════════════════╗
+                        FÖREMÅLSINFORMATION
+╚══════════════════════════════════════════════════════════════╝
+
+ID:                    {id}
+Accessionsnummer:      {accessionsnummer}
+Namn:                  {namn}
+
+Beskrivning:
+{beskrivning}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+KLASSIFICERING:
+Kategori:              {kategori_namn}
+Material:              {material}
+
+TILLVERKNING:
+År:                    {tillverkningsar}
+Plats:                 {tillverkningsplats}
+Tillverkare:           {tillverkare}
+
+FYSISKA EGENSKAPER:
+Mått (L×B×H):          {matt}
+Vikt:                  {vikt}{vikt_enhet}
+Skick:                 {skick}
+
+FÖRVARING:
+Byggnad:               {byggnad}
+Rum:                   {rum}
+Hylla/Sektion:         {hylla_sektion}
+
+REGISTRERING:
+Datum:                 {datum_registrerat}
+Registrerad av:        {registrerad_av}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 """
-        return html
+
+# Text som visas i detaljvyn när ett fält saknas (övriga: "Ej angivet")
+_DETALJ_STANDARDTEXT = {
+    'beskrivning': 'Ingen beskrivning',
+    'kategori_namn': 'Ej angiven',
+    'tillverkningsar': 'Okänt',
+    'tillverkningsplats': 'Okänd',
+    'tillverkare': 'Okänd',
+    'byggnad': 'Ej angiven',
+    'registrerad_av': 'Okänd',
+}
 
 
 class MuseumGUI:
@@ -836,8 +1759,37 @@ class MuseumGUI:
 
         self.db = MuseumDB()
 
-        # Lista för att hålla bilder som ska läggas till
-        self.bilder_att_lagga_till = []
+        # Bilder som ska läggas till, som dict (sökväg -> filnamn) för snabb dubblettkontroll i valordning
+        self.bilder_att_lagga_till = {}
+
+        # Visade namn i kombinationsrutorna -> id, byggs om i uppdatera_*_lista
+        self._kategori_id_per_namn = {}
+        self._plats_id_per_text = {}
+
+        # Sökning medan man skriver körs i en egen tråd
+        self._sok_after_id = None
+        self._sok_generation = 0
+        self._sokpool = ThreadPoolExecutor(max_workers=1)
+
+        # Statistiken hämtas i bakgrunden när statistikfliken visas
+        self._statistik_after_id = None
+        self._statistik_generation = 0
+
+        # Bildbehandling (miniatyrer m.m.) körs utanför Tk-tråden.
+        # Pillow släpper GIL vid avkodning och skalning, så trådar räcker.
+        self._arbetspool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+
+        # Bakgrundstrådarna anropar aldrig Tk själva, de lägger resultatet i en kö
+        # som Tk-tråden tömmer (se i_tk_traden). Efter stang() körs inget mer.
+        self._tk_ko = queue.Queue()
+        self._stanger = False
+        self._tk_ko_after_id = self.root.after(50, self.tom_tk_ko)
+
+        # Detaljfönstret byggs en gång och göms i stället för att stängas
+        self._detalj_fonster = None
+        self._detalj_foremal_id = None
+        self._bild_fonster = None
+        self._bild_generation = 0
 
         # Skapa images-mapp om den inte finns
         self.images_dir = Path("images")
@@ -846,17 +1798,81 @@ class MuseumGUI:
         # Skapa menyfält
         self.skapa_meny()
 
+        # Statusrad längst ner, för meddelanden som inte behöver en dialogruta
+        self.status_var = tk.StringVar()
+        self._status_after_id = None
+        ttk.Label(root, textvariable=self.status_var, anchor=tk.W, relief=tk.SUNKEN,
+                  padding=(5, 2)).pack(side=tk.BOTTOM, fill=tk.X)
+
         # Skapa flikvy
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
-        # Skapa flikar
+        # Skapa flikar. Bara den första byggs direkt, övriga när de visas första gången.
         self.skapa_registrera_flik()
-        self.skapa_sok_flik()
-        self.skapa_kategorier_flik()
-        self.skapa_platser_flik()
-        self.skapa_givare_flik()
-        self.skapa_statistik_flik()
+        self._ej_byggda_flikar = {}
+        self._flik_for_byggare = {}
+        for titel, byggare in (
+            ("Sök föremål", self.skapa_sok_flik),
+            ("Kategorier", self.skapa_kategorier_flik),
+            ("Platser", self.skapa_platser_flik),
+            ("Givare", self.skapa_givare_flik),
+            ("Statistik", self.skapa_statistik_flik),
+        ):
+            frame = ttk.Frame(self.notebook)
+            self.notebook.add(frame, text=titel)
+            self._ej_byggda_flikar[str(frame)] = byggare
+            self._flik_for_byggare[byggare] = str(frame)
+        self.notebook.bind("<<NotebookTabChanged>>", self.bygg_vald_flik)
+
+    def i_tk_traden(self, funktion, *args):
+        """Kör funktion(*args) i Tk-tråden, kan anropas från vilken tråd som helst"""
+        self._tk_ko.put((funktion, args))
+
+    def tom_tk_ko(self):
+        """Kör det som bakgrundstrådarna lagt i kön (körs i Tk-tråden)"""
+        while not self._stanger:
+            try:
+                funktion, args = self._tk_ko.get_nowait()
+            except queue.Empty:
+                break
+            funktion(*args)
+        if not self._stanger:
+            self._tk_ko_after_id = self.root.after(50, self.tom_tk_ko)
+
+    def visa_status(self, text, tid_ms=5000):
+        """Visa ett meddelande i statusraden, det försvinner efter tid_ms"""
+        if self._status_after_id is not None:
+            self.root.after_cancel(self._status_after_id)
+        self.status_var.set(text)
+        self._status_after_id = self.root.after(tid_ms, self.rensa_status)
+
+    def rensa_status(self):
+        """Töm statusraden"""
+        self._status_after_id = None
+        self.status_var.set("")
+
+    def bygg_vald_flik(self, event=None):
+        """Bygg innehållet i den valda fliken om det inte redan gjorts"""
+        flik = self.notebook.select()
+        byggare = self._ej_byggda_flikar.pop(flik, None)
+        if byggare:
+            byggare(self.notebook.nametowidget(flik))
+
+        # Statistiken räknas bara fram när fliken visas
+        if flik == self._flik_for_byggare[self.skapa_statistik_flik]:
+            self.schemalagg_statistik()
+
+    def flik_byggd(self, byggare):
+        """Har fliken som byggs av byggare redan skapats?"""
+        return byggare not in self._ej_byggda_flikar.values()
+
+    def sakerstall_flik(self, byggare):
+        """Bygg en flik direkt, t.ex. när en menyfunktion behöver dess widgets"""
+        for flik, flikbyggare in list(self._ej_byggda_flikar.items()):
+            if flikbyggare == byggare:
+                del self._ej_byggda_flikar[flik]
+                byggare(self.notebook.nametowidget(flik))
 
     def skapa_meny(self):
         """Skapa menyraden"""
@@ -867,6 +1883,7 @@ class MuseumGUI:
         arkiv_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Arkiv", menu=arkiv_menu)
         arkiv_menu.add_command(label="Backup databas", command=self.backup_databas)
+        arkiv_menu.add_command(label="Optimera databas", command=self.optimera_databas)
         arkiv_menu.add_separator()
         arkiv_menu.add_command(label="Avsluta", command=self.root.quit)
 
@@ -875,6 +1892,8 @@ class MuseumGUI:
         menubar.add_cascade(label="Skriv ut", menu=skriv_ut_menu)
         skriv_ut_menu.add_command(label="Skriv ut valt föremål", command=self.skriv_ut_valt_foremal)
         skriv_ut_menu.add_command(label="Skriv ut föremålslista", command=self.skriv_ut_foremalslista)
+        skriv_ut_menu.add_command(label="Exportera valt föremål (fristående HTML)...",
+                                  command=self.exportera_valt_foremal)
         skriv_ut_menu.add_separator()
         skriv_ut_menu.add_command(label="Skriv ut statistik", command=self.skriv_ut_statistik)
         skriv_ut_menu.add_command(label="Skriv ut platslista", command=self.skriv_ut_platslista)
@@ -1022,7 +2041,8 @@ class MuseumGUI:
         button_frame = ttk.Frame(scrollable_frame)
         button_frame.grid(row=row, column=0, columnspan=3, pady=20)
 
-        ttk.Button(button_frame, text="Spara föremål", command=self.spara_foremal).pack(side=tk.LEFT, padx=5)
+        self.spara_knapp = ttk.Button(button_frame, text="Spara föremål", command=self.spara_foremal)
+        self.spara_knapp.pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Rensa formulär", command=self.rensa_formular).pack(side=tk.LEFT, padx=5)
 
         canvas.pack(side="left", fill="both", expand=True)
@@ -1031,10 +2051,8 @@ class MuseumGUI:
         # Generera första accessionsnumret automatiskt när fliken är klar
         self.root.after(100, self.generera_accnr)
 
-    def skapa_sok_flik(self):
+    def skapa_sok_flik(self, frame):
         """Flik för att söka och visa föremål"""
-        frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="Sök föremål")
 
         # Sökfält
         sok_frame = ttk.LabelFrame(frame, text="Sök", padding=10)
@@ -1043,6 +2061,7 @@ class MuseumGUI:
         ttk.Label(sok_frame, text="Sökterm:").grid(row=0, column=0, padx=5)
         self.sokterm_entry = ttk.Entry(sok_frame, width=40)
         self.sokterm_entry.grid(row=0, column=1, padx=5)
+        self.sokterm_entry.bind("<KeyRelease>", self.schemalagg_sokning)
 
         ttk.Label(sok_frame, text="Kategori:").grid(row=0, column=2, padx=5)
         self.sok_kategori_var = tk.StringVar(value="Alla")
@@ -1089,6 +2108,8 @@ class MuseumGUI:
 
         tree_scroll_y.config(command=self.resultat_tree.yview)
         tree_scroll_x.config(command=self.resultat_tree.xview)
+        self._tree_scroll_y = tree_scroll_y
+        self._tree_scroll_x = tree_scroll_x
 
         self.resultat_tree.pack(fill=tk.BOTH, expand=True)
 
@@ -1104,10 +2125,8 @@ class MuseumGUI:
         ttk.Button(button_frame, text="Skriv ut lista", command=self.skriv_ut_foremalslista).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Ta bort föremål", command=self.ta_bort_valt_foremal).pack(side=tk.LEFT, padx=5)
 
-    def skapa_kategorier_flik(self):
+    def skapa_kategorier_flik(self, frame):
         """Flik för att hantera kategorier"""
-        frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="Kategorier")
 
         # Lägg till ny kategori
         input_frame = ttk.LabelFrame(frame, text="Lägg till ny kategori", padding=10)
@@ -1136,10 +2155,8 @@ class MuseumGUI:
 
         self.uppdatera_kategori_listbox()
 
-    def skapa_platser_flik(self):
+    def skapa_platser_flik(self, frame):
         """Flik för att hantera förvaringsplatser"""
-        frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="Platser")
 
         # Lägg till ny plats
         input_frame = ttk.LabelFrame(frame, text="Lägg till ny plats", padding=10)
@@ -1178,10 +2195,8 @@ class MuseumGUI:
 
         self.uppdatera_plats_listbox()
 
-    def skapa_givare_flik(self):
+    def skapa_givare_flik(self, frame):
         """Flik för att hantera givare"""
-        frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="Givare")
 
         # Lägg till ny givare
         input_frame = ttk.LabelFrame(frame, text="Lägg till ny givare", padding=10)
@@ -1227,17 +2242,20 @@ class MuseumGUI:
 
         self.uppdatera_givare_listbox()
 
-    def skapa_statistik_flik(self):
+    def skapa_statistik_flik(self, frame):
         """Flik för att visa statistik"""
-        frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="Statistik")
 
         # Knappar för att uppdatera och skriva ut statistik
         button_frame = ttk.Frame(frame)
         button_frame.pack(pady=10)
-        ttk.Button(button_frame, text="Uppdatera statistik", command=self.uppdatera_statistik).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Uppdatera statistik",
+                   command=lambda: self.uppdatera_statistik(anvand_cache=False)).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Skriv ut statistik", command=self.skriv_ut_statistik).pack(side=tk.LEFT, padx=5)
 
+        # När statistiken senast räknades fram (den sparas tills något ändras)
+        self.statistik_hamtad_label = ttk.Label(frame, foreground="gray")
+        self.statistik_hamtad_label.pack()
+
         # Text widget för statistik
         self.statistik_text = tk.Text(frame, wrap=tk.WORD, height=30)
         self.statistik_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -1246,9 +2264,6 @@ class MuseumGUI:
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.statistik_text.config(yscrollcommand=scrollbar.set)
 
-        # Visa initial statistik
-        self.uppdatera_statistik()
-
     def lagg_till_bild_registrering(self):
         """Lägg till bild vid registrering"""
         filetypes = [
@@ -1265,8 +2280,7 @@ class MuseumGUI:
 
         if filenames:
             for filename in filenames:
-                if filename not in self.bilder_att_lagga_till:
-                    self.bilder_att_lagga_till.append(filename)
+                self.bilder_att_lagga_till.setdefault(filename, os.path.basename(filename))
 
             self.antal_bilder_label.config(text=f"({len(self.bilder_att_lagga_till)} bilder)")
 
@@ -1289,15 +2303,15 @@ class MuseumGUI:
         listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         scrollbar.config(command=listbox.yview)
 
-        for bild in self.bilder_att_lagga_till:
-            listbox.insert(tk.END, Path(bild).name)
+        for filnamn in self.bilder_att_lagga_till.values():
+            listbox.insert(tk.END, filnamn)
 
         # Knapp för att ta bort bild
         def ta_bort_vald():
             selection = listbox.curselection()
             if selection:
                 idx = selection[0]
-                self.bilder_att_lagga_till.pop(idx)
+                del self.bilder_att_lagga_till[list(self.bilder_att_lagga_till)[idx]]
                 listbox.delete(idx)
                 self.antal_bilder_label.config(text=f"({len(self.bilder_att_lagga_till)} bilder)")
 
@@ -1308,20 +2322,7 @@ class MuseumGUI:
         """Generera nästa accessionsnummer"""
         ar = datetime.now().year
         # Hitta högsta numret för detta år
-        sokresultat = self.db.sok_foremal(sokterm=str(ar))
-        max_nr = 0
-        prefix = f"{ar}."
-
-        for row in sokresultat:
-            acc = row['accessionsnummer']
-            if acc.startswith(prefix):
-                try:
-                    nr = int(acc.split('.')[-1])
-                    max_nr = max(max_nr, nr)
-                except ValueError:
-                    pass
-
-        nasta_nr = max_nr + 1
+        nasta_nr = self.db.hogsta_accessionsnummer(ar) + 1
         nytt_acc = f"{ar}.{nasta_nr:03d}"
         self.acc_nr_entry.delete(0, tk.END)
         self.acc_nr_entry.insert(0, nytt_acc)
@@ -1337,30 +2338,9 @@ class MuseumGUI:
             messagebox.showerror("Fel", "Namn måste anges!")
             return
 
-        # Hämta kategori-id
-        kategori_id = None
-        kategori_namn = self.kategori_var.get()
-        if kategori_namn:
-            kategorier = self.db.hamta_kategorier()
-            for kat in kategorier:
-                if kat['namn'] == kategori_namn:
-                    kategori_id = kat['id']
-                    break
-
-        # Hämta plats-id
-        placering_id = None
-        plats_text = self.placering_var.get()
-        if plats_text:
-            platser = self.db.hamta_platser()
-            for plats in platser:
-                plats_str = f"{plats['byggnad']}"
-                if plats['rum']:
-                    plats_str += f" - {plats['rum']}"
-                if plats['hylla_sektion']:
-                    plats_str += f" - {plats['hylla_sektion']}"
-                if plats_str == plats_text:
-                    placering_id = plats['id']
-                    break
+        # Hämta kategori-id och plats-id
+        kategori_id = self._kategori_id_per_namn.get(self.kategori_var.get())
+        placering_id = self._plats_id_per_text.get(self.placering_var.get())
 
         # Konvertera numeriska värden
         def safe_float(val):
@@ -1389,34 +2369,139 @@ class MuseumGUI:
             self.reg_av_entry.get()
         )
 
-        try:
-            foremal_id = self.db.lagg_till_foremal(data)
-
-            # Spara bilder om några valts
-            if self.bilder_att_lagga_till:
-                for bild_path in self.bilder_att_lagga_till:
-                    try:
-                        # Kopiera bild till images-mapp
-                        original_name = Path(bild_path).name
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-                        new_name = f"{foremal_id}_{timestamp}_{original_name}"
-                        destination = self.images_dir / new_name
-
-                        shutil.copy2(bild_path, destination)
-
-                        # Spara i databasen
-                        self.db.lagg_till_foto(foremal_id, str(destination))
-                    except Exception as e:
-                        messagebox.showwarning("Varning", f"Kunde inte spara bild {original_name}: {str(e)}")
-
-            antal_bilder = len(self.bilder_att_lagga_till)
-            messagebox.showinfo("Sparat", f"Föremål sparat med ID: {foremal_id}\n{antal_bilder} bilder tillagda")
+        # Bilderna kopieras och skalas först, i bakgrunden. Föremålet har inget
+        # id än, så filnamnen börjar med accessionsnumret.
+        prefix = "".join(c if c.isalnum() or c in "-." else "_" for c in data[0])
+        kopieringar = self.starta_bildimport(prefix, self.bilder_att_lagga_till)
+        if kopieringar:
+            self.spara_knapp.config(state=tk.DISABLED)
+            self.root.config(cursor="watch")
+            self.visa_status(f"Importerar {len(kopieringar)} bilder...")
+
+        def kontrollera():
+            if not all(future.done() for _, _, future in kopieringar):
+                self.root.after(50, kontrollera)
+                return
+
+            self.spara_knapp.config(state=tk.NORMAL)
+            self.root.config(cursor="")
+            resultat, kopierade, miniatyrer = self.samla_bildimport(kopieringar)
+            try:
+                # Föremålet och dess foton sparas i en kort transaktion, så att ett
+                # fel inte lämnar kvar ett föremål utan sina bilder
+                with self.db.transaktion():
+                    foremal_id = self.db.lagg_till_foremal(data)
+                    if kopierade:
+                        self.db.lagg_till_foton_batch(foremal_id, kopierade, miniatyrer)
+            except sqlite3.IntegrityError as e:
+                # Transaktionen har rullats tillbaka, de kopierade bilderna tas bort
+                self.ta_bort_importerade(kopieringar)
+                messagebox.showerror("Fel", f"Accessionsnummer finns redan!")
+                return
+            except Exception as e:
+                self.ta_bort_importerade(kopieringar)
+                messagebox.showerror("Fel", f"Kunde inte spara: {str(e)}")
+                return
+
+            antal_bilder = len(kopierade)
+            self.visa_status(f"Sparat: föremål med ID {foremal_id} ({antal_bilder} bilder tillagda)")
+            # Sammanfattningen visas först efter commit, så att dialogen inte håller skrivlåset
+            if antal_bilder < len(resultat):
+                self.visa_importresultat(resultat)
             self.rensa_formular()
             self.generera_accnr()  # Förbereda nästa nummer
-        except sqlite3.IntegrityError as e:
-            messagebox.showerror("Fel", f"Accessionsnummer finns redan!")
-        except Exception as e:
-            messagebox.showerror("Fel", f"Kunde inte spara: {str(e)}")
+
+        kontrollera()
+
+    def starta_bildimport(self, prefix, bilder):
+        """Börja kopiera bilder (dict sökväg -> filnamn) till images-mapp i bakgrunden
+
+        Varje bild kopieras och får sina miniatyrer i en egen arbetstråd (se
+        importera_bild). Filnamnen börjar med prefix, föremålets id eller för ett
+        nytt föremål accessionsnumret. Returnerar en lista som lämnas till
+        samla_bildimport eller slutfor_bildimport.
+        """
+        # Tidsstämpeln tas en gång, löpnumret håller isär filerna i samma import
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Lokala namn i loopen, sökvägen byggs direkt som sträng (så som den sparas i databasen)
+        images_dir = str(self.images_dir)
+        submit = self._arbetspool.submit
+        kopieringar = []
+        for nr, (bild_path, original_name) in enumerate(bilder.items()):
+            destination = os.path.join(images_dir, f"{prefix}_{timestamp}_{nr:03d}_{original_name}")
+            kopieringar.append((original_name, destination, submit(importera_bild, bild_path, destination)))
+        return kopieringar
+
+    def samla_bildimport(self, kopieringar):
+        """Samla resultatet av klara kopieringar från starta_bildimport
+
+        Returnerar (en Bildimport per bild i samma ordning som kopieringar,
+        sökvägar till kopierade bilder, deras utskriftsminiatyrer).
+        """
+        resultat = []
+        kopierade = []
+        miniatyrer = []
+        for original_name, destination, future in kopieringar:
+            try:
+                miniatyrer.append(future.result())
+                kopierade.append(destination)
+                resultat.append(Bildimport(original_name, True, None))
+            except Exception as e:
+                ta_bort_bild(destination)  # Kopian kan finnas även om miniatyrerna misslyckades
+                resultat.append(Bildimport(original_name, False, str(e)))
+        return resultat, kopierade, miniatyrer
+
+    def slutfor_bildimport(self, foremal_id, kopieringar):
+        """Vänta in kopieringarna och spara bilderna i databasen med en executemany
+
+        Körs i Tk-tråden. Returnerar en lista med ett Bildimport per bild, i
+        samma ordning som kopieringar. Inga dialoger visas här, se visa_importresultat.
+        """
+        resultat, kopierade, miniatyrer = self.samla_bildimport(kopieringar)
+        if kopierade:
+            self.db.lagg_till_foton_batch(foremal_id, kopierade, miniatyrer)
+        return resultat
+
+    def ta_bort_importerade(self, kopieringar):
+        """Ta bort filerna från en bildimport som inte kunde sparas i databasen
+
+        Väntar in kopieringar som fortfarande pågår.
+        """
+        for _, destination, future in kopieringar:
+            try:
+                miniatyr = future.result()
+            except Exception:
+                miniatyr = None
+            ta_bort_bild(destination, miniatyr)
+
+    def visa_importresultat(self, resultat):
+        """Visa en sammanfattning av en bildimport, med felen i ett eget fönster på begäran"""
+        fel = [r for r in resultat if not r.ok]
+        sammanfattning = f"{len(resultat) - len(fel)} bilder tillagda. {len(fel)} misslyckades."
+        if not fel:
+            messagebox.showinfo("Sparat", sammanfattning)
+            return
+        if not messagebox.askyesno("Sparat", sammanfattning + "\n\nVisa detaljer?", icon=messagebox.WARNING):
+            return
+
+        detalj_window = tk.Toplevel(self.root)
+        detalj_window.title("Misslyckade bilder")
+        detalj_window.geometry("600x300")
+
+        text_frame = ttk.Frame(detalj_window)
+        text_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        scrollbar = ttk.Scrollbar(text_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        text = tk.Text(text_frame, wrap=tk.WORD, yscrollcommand=scrollbar.set)
+        text.pack(fill=tk.BOTH, expand=True)
+        scrollbar.config(command=text.yview)
+
+        text.insert("1.0", "\n".join(f"{r.namn}: {r.fel}" for r in fel))
+        text.config(state=tk.DISABLED)
+
+        ttk.Button(detalj_window, text="Stäng", command=detalj_window.destroy).pack(pady=(0, 10))
 
     def rensa_formular(self):
         """Rensa registreringsformuläret"""
@@ -1435,82 +2520,162 @@ class MuseumGUI:
         self.skick_var.set("Gott")
         self.placering_var.set("")
         self.reg_av_entry.delete(0, tk.END)
-        self.bilder_att_lagga_till = []
+        self.bilder_att_lagga_till = {}
         self.antal_bilder_label.config(text="(0 bilder)")
 
     def uppdatera_kategori_lista(self):
         """Uppdatera kategorilistan i combobox"""
         kategorier = self.db.hamta_kategorier()
-        kategori_namn = [kat['namn'] for kat in kategorier]
-        self.kategori_combo['values'] = kategori_namn
+        self._kategori_id_per_namn = {kat.namn: kat.id for kat in kategorier}
+        self.kategori_combo['values'] = list(self._kategori_id_per_namn)
 
     def uppdatera_plats_lista(self):
         """Uppdatera platslistan i combobox"""
         platser = self.db.hamta_platser()
-        plats_lista = []
+        self._plats_id_per_text = {}
         for plats in platser:
-            plats_str = f"{plats['byggnad']}"
-            if plats['rum']:
-                plats_str += f" - {plats['rum']}"
-            if plats['hylla_sektion']:
-                plats_str += f" - {plats['hylla_sektion']}"
-            plats_lista.append(plats_str)
-        self.placering_combo['values'] = plats_lista
+            self._plats_id_per_text.setdefault(plats.visningsnamn, plats.id)
+        self.placering_combo['values'] = list(self._plats_id_per_text)
 
     def uppdatera_sok_kategori_lista(self):
         """Uppdatera kategorilistan för sökning"""
         kategorier = self.db.hamta_kategorier()
-        kategori_namn = ["Alla"] + [kat['namn'] for kat in kategorier]
-        self.sok_kategori_combo['values'] = kategori_namn
+        self._kategori_id_per_namn = {kat.namn: kat.id for kat in kategorier}
+        self.sok_kategori_combo['values'] = ["Alla"] + list(self._kategori_id_per_namn)
 
     def sok_foremal(self):
         """Sök efter föremål"""
         sokterm = self.sokterm_entry.get()
         kategori_namn = self.sok_kategori_var.get()
 
-        kategori_id = None
-        if kategori_namn and kategori_namn != "Alla":
-            kategorier = self.db.hamta_kategorier()
-            for kat in kategorier:
-                if kat['namn'] == kategori_namn:
-                    kategori_id = kat['id']
-                    break
+        kategori_id = self._kategori_id_per_namn.get(kategori_namn)
 
+        self.avbryt_sokning()
         resultat = self.db.sok_foremal(sokterm, kategori_id)
         self.visa_sokresultat(resultat)
 
+    def avbryt_sokning(self):
+        """Avbryt en schemalagd eller pågående bakgrundssökning
+
+        Anropas innan resultatlistan fylls direkt, så att sökningen inte
+        skriver över eller lägger rader ovanpå det nya resultatet.
+        """
+        if self._sok_after_id is not None:
+            self.root.after_cancel(self._sok_after_id)
+            self._sok_after_id = None
+        self._sok_generation += 1
+
+    def schemalagg_sokning(self, event=None):
+        """Sök automatiskt när användaren slutat skriva en stund"""
+        if self._sok_after_id is not None:
+            self.root.after_cancel(self._sok_after_id)
+        self._sok_after_id = self.root.after(250, self.kor_sokning)
+
+    def kor_sokning(self):
+        """Kör sökningen i bakgrunden och visa resultatet i omgångar medan det hämtas"""
+        self._sok_after_id = None
+        sokterm = self.sokterm_entry.get()
+        kategori_namn = self.sok_kategori_var.get()
+
+        kategori_id = self._kategori_id_per_namn.get(kategori_namn)
+
+        # Bara det senaste sökresultatet visas
+        self._sok_generation += 1
+        generation = self._sok_generation
+
+        def sok():
+            antal = 0
+            omgangar = self.db.sok_foremal_i_omgangar(sokterm, kategori_id)
+            try:
+                for omgang in omgangar:
+                    if generation != self._sok_generation or self._stanger:
+                        return  # En nyare sökning har startats eller programmet stängs
+                    self.i_tk_traden(self.visa_sokomgang, generation, omgang, antal == 0)
+                    antal += len(omgang)
+            except Exception as e:
+                print(f"Fel vid sökning: {e}")
+                return
+            finally:
+                omgangar.close()
+            self.i_tk_traden(self.avsluta_sokning, generation, antal)
+
+        self._sokpool.submit(sok)
+
+    def visa_sokomgang(self, generation, omgang, forsta):
+        """Lägg till en omgång rader från bakgrundssökningen, om ingen nyare sökning startats"""
+        if generation == self._sok_generation:
+            self.lagg_till_sokrader(omgang, rensa=forsta)
+
+    def avsluta_sokning(self, generation, antal):
+        """Visa antalet träffar när bakgrundssökningen är klar"""
+        if generation != self._sok_generation:
+            return
+        if antal == 0:
+            self.lagg_till_sokrader([], rensa=True)
+        self.visa_status(f"Hittade {antal} föremål")
+
     def visa_alla_foremal(self):
         """Visa alla föremål"""
+        self.avbryt_sokning()
         resultat = self.db.sok_foremal()
         self.visa_sokresultat(resultat)
 
     def visa_sokresultat(self, resultat):
         """Visa sökresultat i treeview"""
-        # Rensa befintligt innehåll
-        for item in self.resultat_tree.get_children():
-            self.resultat_tree.delete(item)
-
-        # Lägg till resultat
-        for row in resultat:
-            plats_str = row['byggnad'] if row['byggnad'] else ""
-            if row['rum']:
-                plats_str += f" - {row['rum']}"
-
-            self.resultat_tree.insert(
-                "",
-                tk.END,
-                text=str(row['id']),
-                values=(
-                    row['accessionsnummer'],
-                    row['namn'],
-                    row['kategori_namn'] if row['kategori_namn'] else "",
-                    row['material'] if row['material'] else "",
-                    plats_str
-                )
-            )
+        self.lagg_till_sokrader(resultat, rensa=True)
 
         # Visa antal resultat
-        messagebox.showinfo("Sökresultat", f"Hittade {len(resultat)} föremål")
+        self.visa_status(f"Hittade {len(resultat)} föremål")
+
+    def lagg_till_sokrader(self, resultat, rensa=False):
+        """Lägg till rader sist i resultatlistan, efter att ha tömt den om rensa"""
+        # Koppla loss trädet medan det fylls, så ritas det om en gång istället för per rad
+        tree = self.resultat_tree
+        tree.pack_forget()
+        tree.configure(yscrollcommand="", xscrollcommand="")
+
+        try:
+            # Rensa befintligt innehåll
+            if rensa:
+                tree.delete(*tree.get_children())
+            antal_fore = len(tree.get_children())
+
+            # Lägg till resultat
+            rader = []
+            for row in resultat:
+                plats_str = row.byggnad or ""
+                if row.rum:
+                    plats_str += f" - {row.rum}"
+
+                rader.append((
+                    str(row.id),
+                    (
+                        row.accessionsnummer,
+                        row.namn,
+                        row.kategori_namn or "",
+                        row.material or "",
+                        plats_str
+                    )
+                ))
+
+            # Alla rader i ett enda Tcl-skript istället för ett anrop per rad.
+            # Föremålets id används även som radens id (iid).
+            try:
+                tree.tk.eval("\n".join(
+                    f"{tree._w} insert {{}} end -id {_tcl_ord(text)} -text {_tcl_ord(text)} "
+                    f"-values [list {' '.join(map(_tcl_ord, values))}]"
+                    for text, values in rader
+                ))
+            except tk.TclError:
+                # Ta bort det som hann läggas till och gör om en rad i taget,
+                # rader som redan finns i listan hoppas över
+                tree.delete(*tree.get_children()[antal_fore:])
+                for text, values in rader:
+                    if not tree.exists(text):
+                        tree.insert("", tk.END, iid=text, text=text, values=values)
+        finally:
+            tree.configure(yscrollcommand=self._tree_scroll_y.set, xscrollcommand=self._tree_scroll_x.set)
+            tree.pack(fill=tk.BOTH, expand=True)
 
     def visa_foremal_detaljer(self, event):
         """Visa detaljer för valt föremål"""
@@ -1519,16 +2684,13 @@ class MuseumGUI:
             messagebox.showwarning("Varning", "Välj ett föremål först!")
             return
 
-        item = self.resultat_tree.item(selection[0])
-        foremal_id = int(item['text'])
-
-        foremal = self.db.hamta_foremal(foremal_id)
-        foton = self.db.hamta_foton(foremal_id)
+        self.fyll_detaljfonster(int(selection[0]))
 
-        # Skapa detaljfönster
+    def bygg_detaljfonster(self):
+        """Bygg detaljfönstret (anropas bara första gången det behövs)"""
         detalj_window = tk.Toplevel(self.root)
-        detalj_window.title(f"Föremål: {foremal['namn']}")
         detalj_window.geometry("800x900")
+        detalj_window.protocol("WM_DELETE_WINDOW", detalj_window.withdraw)
 
         # Lista för att spara bildreferenser (viktigt för att bilderna ska visas)
         detalj_window.image_references = []
@@ -1544,154 +2706,218 @@ class MuseumGUI:
         text.pack(fill=tk.BOTH, expand=True)
         scrollbar.config(command=text.yview)
 
-        # Formatera och visa information
-        info = f"""
-╔══════════════════════════════════════════════════════════════╗
-                        FÖREMÅLSINFORMATION
-╚══════════════════════════════════════════════════════════════╝
+        # Bildsektion, canvas med scrollbar för bilder
+        bild_frame = ttk.LabelFrame(detalj_window, text="Bilder", padding=10)
+        bild_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
 
-ID:                    {foremal['id']}
-Accessionsnummer:      {foremal['accessionsnummer']}
-Namn:                  {foremal['namn']}
+        canvas = tk.Canvas(bild_frame, height=200)
+        scrollbar = ttk.Scrollbar(bild_frame, orient="horizontal", command=canvas.xview)
+        scrollable_bild_frame = ttk.Frame(canvas)
 
-Beskrivning:
-{foremal['beskrivning'] if foremal['beskrivning'] else 'Ingen beskrivning'}
+        detalj_window.uppdatera_scrollregion = lambda e=None: canvas.configure(scrollregion=canvas.bbox("all"))
+        scrollable_bild_frame.bind("<Configure>", detalj_window.uppdatera_scrollregion)
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+        canvas.create_window((0, 0), window=scrollable_bild_frame, anchor="nw")
+        canvas.configure(xscrollcommand=scrollbar.set)
 
-KLASSIFICERING:
-Kategori:              {foremal['kategori_namn'] if foremal['kategori_namn'] else 'Ej angiven'}
-Material:              {foremal['material'] if foremal['material'] else 'Ej angivet'}
+        canvas.pack(side="top", fill="both", expand=True)
+        scrollbar.pack(side="bottom", fill="x")
 
-TILLVERKNING:
-År:                    {foremal['tillverkningsar'] if foremal['tillverkningsar'] else 'Okänt'}
-Plats:                 {foremal['tillverkningsplats'] if foremal['tillverkningsplats'] else 'Okänd'}
-Tillverkare:           {foremal['tillverkare'] if foremal['tillverkare'] else 'Okänd'}
+        # Knapp för att lägga till fler bilder, gäller föremålet som visas just nu
+        bild_knapp = ttk.Button(bild_frame,
+                                command=lambda: self.lagg_till_bild_till_foremal(self._detalj_foremal_id))
+        bild_knapp.pack(pady=5)
 
-FYSISKA EGENSKAPER:
-Mått (L×B×H):          {self.format_matt(foremal['matt_langd'], foremal['matt_bredd'], foremal['matt_hojd'])}
-Vikt:                  {foremal['vikt'] if foremal['vikt'] else 'Ej angivet'} {'g' if foremal['vikt'] else ''}
-Skick:                 {foremal['skick'] if foremal['skick'] else 'Ej angivet'}
+        # Stäng-knapp
+        ttk.Button(detalj_window, text="Stäng", command=detalj_window.withdraw).pack(pady=10)
 
-FÖRVARING:
-Byggnad:               {foremal['byggnad'] if foremal['byggnad'] else 'Ej angiven'}
-Rum:                   {foremal['rum'] if foremal['rum'] else 'Ej angivet'}
-Hylla/Sektion:         {foremal['hylla_sektion'] if foremal['hylla_sektion'] else 'Ej angivet'}
+        detalj_window.text = text
+        detalj_window.bild_frame = bild_frame
+        detalj_window.bild_canvas = canvas
+        detalj_window.bilder = scrollable_bild_frame
+        detalj_window.bild_knapp = bild_knapp
+        self._detalj_fonster = detalj_window
 
-REGISTRERING:
-Datum:                 {foremal['datum_registrerat']}
-Registrerad av:        {foremal['registrerad_av'] if foremal['registrerad_av'] else 'Okänd'}
+    def fyll_detaljfonster(self, foremal_id):
+        """Visa ett föremål i detaljfönstret, bygger fönstret vid behov"""
+        foremal, foton = self.db.hamta_foremal_med_foton(foremal_id)
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-"""
+        if self._detalj_fonster is None or not self._detalj_fonster.winfo_exists():
+            self.bygg_detaljfonster()
+        detalj_window = self._detalj_fonster
+        self._detalj_foremal_id = foremal_id
+        detalj_window.title(f"Föremål: {foremal.namn}")
 
+        # Formatera och visa information
+        varden = {
+            nyckel: varde if varde else _DETALJ_STANDARDTEXT.get(nyckel, 'Ej angivet')
+            for nyckel, varde in zip(foremal.keys(), foremal)
+        }
+        varden['matt'] = self.format_matt(foremal.matt_langd, foremal.matt_bredd, foremal.matt_hojd)
+        varden['vikt_enhet'] = ' g' if foremal.vikt else ' '
+        info = _DETALJ_MALL.format_map(varden)
+
+        text = detalj_window.text
+        text.config(state=tk.NORMAL)
+        text.delete("1.0", tk.END)
         text.insert("1.0", info)
         text.config(state=tk.DISABLED)
 
-        # Bildsektion
+        # Ta bort förra föremålets bilder. Miniatyrer som fortfarande laddas
+        # hamnar på borttagna etiketter och ignoreras i visa_miniatyrbild.
+        for barn in detalj_window.bilder.winfo_children():
+            barn.destroy()
+        detalj_window.image_references.clear()
+        detalj_window.bild_canvas.xview_moveto(0)
+
         if foton:
-            bild_frame = ttk.LabelFrame(detalj_window, text=f"Bilder ({len(foton)} st)", padding=10)
-            bild_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+            detalj_window.bild_frame.config(text=f"Bilder ({len(foton)} st)")
+            detalj_window.bild_knapp.config(text="Lägg till fler bilder")
+        else:
+            detalj_window.bild_frame.config(text="Bilder")
+            detalj_window.bild_knapp.config(text="Lägg till bilder")
+            ttk.Label(detalj_window.bilder, text="Inga bilder registrerade").grid(row=0, column=0, padx=5, pady=5)
 
-            # Skapa canvas med scrollbar för bilder
-            canvas = tk.Canvas(bild_frame, height=200)
-            scrollbar = ttk.Scrollbar(bild_frame, orient="horizontal", command=canvas.xview)
-            scrollable_bild_frame = ttk.Frame(canvas)
+        # Koppla bort scrollregion-uppdateringen medan bilderna läggs ut,
+        # den räknas om en gång när alla är på plats
+        detalj_window.bilder.unbind("<Configure>")
 
-            scrollable_bild_frame.bind(
-                "<Configure>",
-                lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-            )
+        # Visa miniatyrer, bilderna läses in i bakgrunden och visas när de är klara
+        col = 0
+        for foto in foton:
+            try:
+                img_path = foto.filsokvag
+                if os.path.exists(img_path):
+                    # Skapa frame för varje bild
+                    img_container = ttk.Frame(detalj_window.bilder)
+                    img_container.grid(row=0, column=col, padx=5, pady=5)
+
+                    # Bild (platshållare tills miniatyren är inläst)
+                    img_label = tk.Label(img_container, text="Laddar...", width=20, height=8)
+                    img_label.pack()
+
+                    future = self._arbetspool.submit(ladda_miniatyrbild, img_path, DETALJ_MINIATYR_STORLEK)
+                    future.add_done_callback(
+                        lambda f, label=img_label: self.i_tk_traden(
+                            self.visa_miniatyrbild, detalj_window, label, f)
+                    )
 
-            canvas.create_window((0, 0), window=scrollable_bild_frame, anchor="nw")
-            canvas.configure(xscrollcommand=scrollbar.set)
+                    # Klick för att visa fullstorlek
+                    img_label.bind("<Button-1>", lambda e, path=img_path: self.visa_bild_fullstorlek(path))
 
-            # Visa miniatyrer
-            col = 0
-            for foto in foton:
-                try:
-                    # Ladda och skala bild
-                    img_path = foto['filsokvag']
-                    if os.path.exists(img_path):
-                        img = Image.open(img_path)
-                        img.thumbnail((150, 150))
-                        photo = ImageTk.PhotoImage(img)
-
-                        # Spara referens i fönstrets lista (kritiskt för att bilden ska visas!)
-                        detalj_window.image_references.append(photo)
-
-                        # Skapa frame för varje bild
-                        img_container = ttk.Frame(scrollable_bild_frame)
-                        img_container.grid(row=0, column=col, padx=5, pady=5)
-
-                        # Bild
-                        img_label = tk.Label(img_container, image=photo)
-                        img_label.image = photo  # Behåll referens på labeln
-                        img_label.pack()
-
-                        # Klick för att visa fullstorlek
-                        img_label.bind("<Button-1>", lambda e, path=img_path: self.visa_bild_fullstorlek(path))
-
-                        # Filnamn
-                        ttk.Label(img_container, text=Path(img_path).name, wraplength=150).pack()
-
-                        col += 1
-                    else:
-                        # Bildfil saknas
-                        img_container = ttk.Frame(scrollable_bild_frame)
-                        img_container.grid(row=0, column=col, padx=5, pady=5)
-                        ttk.Label(img_container, text="Bild saknas", foreground="red").pack()
-                        col += 1
-
-                except Exception as e:
-                    print(f"Fel vid laddning av bild: {e}")
-
-            canvas.pack(side="top", fill="both", expand=True)
-            scrollbar.pack(side="bottom", fill="x")
-
-            # Knapp för att lägga till fler bilder
-            ttk.Button(bild_frame, text="Lägg till fler bilder",
-                      command=lambda: self.lagg_till_bild_till_foremal(foremal_id, detalj_window)).pack(pady=5)
-        else:
-            # Ingen bild finns
-            bild_frame = ttk.LabelFrame(detalj_window, text="Bilder", padding=10)
-            bild_frame.pack(fill=tk.X, padx=10, pady=5)
-            ttk.Label(bild_frame, text="Inga bilder registrerade").pack()
-            ttk.Button(bild_frame, text="Lägg till bilder",
-                      command=lambda: self.lagg_till_bild_till_foremal(foremal_id, detalj_window)).pack(pady=5)
+                    # Filnamn
+                    ttk.Label(img_container, text=os.path.basename(img_path), wraplength=150).pack()
 
-        # Stäng-knapp
-        ttk.Button(detalj_window, text="Stäng", command=detalj_window.destroy).pack(pady=10)
+                    col += 1
+                else:
+                    # Bildfil saknas
+                    img_container = ttk.Frame(detalj_window.bilder)
+                    img_container.grid(row=0, column=col, padx=5, pady=5)
+                    ttk.Label(img_container, text="Bild saknas", foreground="red").pack()
+                    col += 1
 
-    def visa_bild_fullstorlek(self, img_path):
-        """Visa bild i fullstorlek"""
-        bild_window = tk.Toplevel(self.root)
-        bild_window.title(Path(img_path).name)
+            except Exception as e:
+                print(f"Fel vid laddning av bild: {e}")
+
+        detalj_window.bilder.update_idletasks()
+        detalj_window.uppdatera_scrollregion()
+        detalj_window.bilder.bind("<Configure>", detalj_window.uppdatera_scrollregion)
+
+        detalj_window.deiconify()
+        detalj_window.lift()
+
+    def visa_miniatyrbild(self, detalj_window, img_label, future):
+        """Visa en miniatyr som lästs in i bakgrunden (körs i Tk-tråden)"""
+        if not img_label.winfo_exists():
+            return  # Ett annat föremål visas nu, eller fönstret har stängts
 
         try:
-            # Ladda bild
-            img = Image.open(img_path)
+            photo = ImageTk.PhotoImage(future.result())
+        except Exception as e:
+            print(f"Fel vid laddning av bild: {e}")
+            img_label.config(text="Kunde inte läsa bilden", foreground="red")
+            return
+
+        # Spara referens i fönstrets lista (kritiskt för att bilden ska visas!)
+        detalj_window.image_references.append(photo)
+        img_label.config(image=photo, text="", width=0, height=0)
+        img_label.image = photo  # Behåll referens på labeln
 
-            # Skala ner om bilden är för stor
+    def visa_bild_fullstorlek(self, img_path, original=False):
+        """Visa bild i fullstorlek
+
+        Som standard visas förhandsvisningen från miniatyrcachen, som skapades
+        när bilden importerades. Med original=True avkodas originalfilen.
+        Samma fönster återanvänds för alla bilder.
+        """
+        if original:
+            max_width = self.root.winfo_screenwidth() - 100
+            max_height = self.root.winfo_screenheight() - 150
+        else:
             max_width = 1000
             max_height = 800
-            img.thumbnail((max_width, max_height))
-
-            photo = ImageTk.PhotoImage(img)
 
-            # Visa bild
-            label = tk.Label(bild_window, image=photo)
-            label.image = photo  # Behåll referens
-            label.pack()
+        # Bilden läses in i bakgrunden, bara den senast begärda visas
+        self._bild_generation += 1
+        generation = self._bild_generation
+        self.root.config(cursor="watch")
+        future = self._arbetspool.submit(ladda_forhandsvisning, img_path, max_width, max_height, original)
+        future.add_done_callback(
+            lambda f: self.i_tk_traden(self.visa_inlast_bild, generation, img_path, original, f)
+        )
 
-            # Stäng-knapp
-            ttk.Button(bild_window, text="Stäng", command=bild_window.destroy).pack(pady=5)
+    def visa_inlast_bild(self, generation, img_path, original, future):
+        """Visa en bild som lästs in av visa_bild_fullstorlek (körs i Tk-tråden)"""
+        if generation != self._bild_generation:
+            return  # En annan bild har begärts sedan dess
+        self.root.config(cursor="")
 
+        try:
+            photo = ImageTk.PhotoImage(future.result())
         except Exception as e:
             messagebox.showerror("Fel", f"Kunde inte visa bild: {str(e)}")
-            bild_window.destroy()
+            return
+
+        if self._bild_fonster is None or not self._bild_fonster.winfo_exists():
+            self.bygg_bildfonster()
+        bild_window = self._bild_fonster
+        bild_window.title(os.path.basename(img_path))
+
+        # Visa bild
+        bild_window.bild_label.config(image=photo)
+        bild_window.bild_label.image = photo  # Behåll referens
+
+        if original:
+            bild_window.original_knapp.config(state=tk.DISABLED)
+        else:
+            bild_window.original_knapp.config(
+                state=tk.NORMAL,
+                command=lambda: self.visa_bild_fullstorlek(img_path, original=True))
+
+        bild_window.deiconify()
+        bild_window.lift()
+
+    def bygg_bildfonster(self):
+        """Bygg fönstret för bildvisning (anropas bara första gången det behövs)"""
+        bild_window = tk.Toplevel(self.root)
+        bild_window.protocol("WM_DELETE_WINDOW", bild_window.withdraw)
+
+        bild_label = tk.Label(bild_window)
+        bild_label.pack()
 
-    def lagg_till_bild_till_foremal(self, foremal_id, parent_window):
+        knapp_frame = ttk.Frame(bild_window)
+        knapp_frame.pack(pady=5)
+        original_knapp = ttk.Button(knapp_frame, text="Visa original")
+        original_knapp.pack(side=tk.LEFT, padx=5)
+
+        # Stäng-knapp
+        ttk.Button(knapp_frame, text="Stäng", command=bild_window.withdraw).pack(side=tk.LEFT, padx=5)
+
+        bild_window.bild_label = bild_label
+        bild_window.original_knapp = original_knapp
+        self._bild_fonster = bild_window
+
+    def lagg_till_bild_till_foremal(self, foremal_id):
         """Lägg till bild till ett befintligt föremål"""
         filetypes = [
             ("Bilderfiler", "*.jpg *.jpeg *.png *.gif *.bmp"),
@@ -1705,31 +2931,35 @@ Registrerad av:        {foremal['registrerad_av'] if foremal['registrerad_av'] e
             filetypes=filetypes
         )
 
-        if filenames:
-            antal_tillagda = 0
-            for filename in filenames:
-                try:
-                    # Kopiera bild till images-mapp
-                    original_name = Path(filename).name
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-                    new_name = f"{foremal_id}_{timestamp}_{original_name}"
-                    destination = self.images_dir / new_name
+        if not filenames:
+            return
 
-                    shutil.copy2(filename, destination)
+        bilder = {filename: os.path.basename(filename) for filename in filenames}
+        kopieringar = self.starta_bildimport(foremal_id, bilder)
+        self.root.config(cursor="watch")
+        self.visa_status(f"Importerar {len(kopieringar)} bilder...")
 
-                    # Spara i databasen
-                    self.db.lagg_till_foto(foremal_id, str(destination))
-                    antal_tillagda += 1
+        # Fönstret fortsätter att ritas om medan bilderna kopieras och skalas
+        def kontrollera():
+            if not all(future.done() for _, _, future in kopieringar):
+                self.root.after(50, kontrollera)
+                return
 
-                except Exception as e:
-                    messagebox.showwarning("Varning", f"Kunde inte spara bild {original_name}: {str(e)}")
+            self.root.config(cursor="")
+            try:
+                resultat = self.slutfor_bildimport(foremal_id, kopieringar)
+            except Exception as e:
+                self.ta_bort_importerade(kopieringar)
+                messagebox.showerror("Fel", f"Kunde inte spara bilderna: {str(e)}")
+                return
+            self.visa_importresultat(resultat)
+
+            if any(r.ok for r in resultat):
+                # Visa föremålet igen så att de nya bilderna syns, om det fortfarande visas
+                if self._detalj_foremal_id == foremal_id and self._detalj_fonster.winfo_viewable():
+                    self.fyll_detaljfonster(foremal_id)
 
-            if antal_tillagda > 0:
-                messagebox.showinfo("Sparat", f"{antal_tillagda} bilder tillagda")
-                # Stäng och öppna detaljfönstret igen för att visa nya bilder
-                parent_window.destroy()
-                # Simulera att användaren har valt föremålet igen
-                # Detta är lite av en workaround, men fungerar
+        kontrollera()
 
     def format_matt(self, l, b, h):
         """Formatera måttangivelser"""
@@ -1753,23 +2983,29 @@ Registrerad av:        {foremal['registrerad_av'] if foremal['registrerad_av'] e
             return
 
         try:
-            self.db.lagg_till_kategori(namn)
-            messagebox.showinfo("Sparat", f"Kategori '{namn}' tillagd!")
+            kategori_id = self.db.lagg_till_kategori(namn)
+            self.visa_status(f"Kategori '{namn}' tillagd")
             self.ny_kategori_entry.delete(0, tk.END)
-            self.uppdatera_kategori_listbox()
+            # Lägg bara in den nya raden på sin plats i sorteringen
+            idx = bisect.bisect(self._kategori_sortering, namn)
+            self._kategori_sortering.insert(idx, namn)
+            self.kategori_listbox.insert(idx, f"{kategori_id}: {namn}")
             self.uppdatera_kategori_lista()
-            self.uppdatera_sok_kategori_lista()
+            if self.flik_byggd(self.skapa_sok_flik):
+                self.uppdatera_sok_kategori_lista()
         except sqlite3.IntegrityError:
             messagebox.showerror("Fel", "Kategorin finns redan!")
         except Exception as e:
             messagebox.showerror("Fel", f"Kunde inte lägga till kategori: {str(e)}")
 
     def uppdatera_kategori_listbox(self):
-        """Uppdatera kategorilistan"""
+        """Bygg kategorilistan från databasen (ändringar görs sedan radvis)"""
         self.kategori_listbox.delete(0, tk.END)
         kategorier = self.db.hamta_kategorier()
-        for kat in kategorier:
-            self.kategori_listbox.insert(tk.END, f"{kat['id']}: {kat['namn']}")
+        # Sorteringsnycklar i listboxens ordning, för insättning med bisect
+        self._kategori_sortering = [kat.namn for kat in kategorier]
+        # Alla rader i ett enda insert-anrop till Tk
+        self.kategori_listbox.insert(tk.END, *(f"{kat.id}: {kat.namn}" for kat in kategorier))
 
     def lagg_till_plats(self):
         """Lägg till ny plats"""
@@ -1782,30 +3018,31 @@ Registrerad av:        {foremal['registrerad_av'] if foremal['registrerad_av'] e
             return
 
         try:
-            self.db.lagg_till_plats(byggnad, rum if rum else None, hylla if hylla else None)
-            messagebox.showinfo("Sparat", "Plats tillagd!")
+            plats_id = self.db.lagg_till_plats(byggnad, rum if rum else None, hylla if hylla else None)
+            self.visa_status("Plats tillagd")
             self.plats_byggnad_entry.delete(0, tk.END)
             self.plats_rum_entry.delete(0, tk.END)
             self.plats_hylla_entry.delete(0, tk.END)
-            self.uppdatera_plats_listbox()
+            # Lägg bara in den nya raden på sin plats i sorteringen (byggnad, rum)
+            nyckel = (byggnad, rum)
+            idx = bisect.bisect(self._plats_sortering, nyckel)
+            self._plats_sortering.insert(idx, nyckel)
+            self.plats_id_mapping.insert(idx, plats_id)
+            visningsnamn = " - ".join(falt for falt in (byggnad, rum, hylla) if falt)
+            self.plats_listbox.insert(idx, visningsnamn)
             self.uppdatera_plats_lista()
         except Exception as e:
             messagebox.showerror("Fel", f"Kunde inte lägga till plats: {str(e)}")
 
     def uppdatera_plats_listbox(self):
-        """Uppdatera platslistan"""
+        """Bygg platslistan från databasen (ändringar görs sedan radvis)"""
         self.plats_listbox.delete(0, tk.END)
         platser = self.db.hamta_platser()
-        # Lagra plats-ID:n för varje listbox-rad
-        self.plats_id_mapping = {}
-        for idx, plats in enumerate(platser):
-            plats_str = f"{plats['byggnad']}"
-            if plats['rum']:
-                plats_str += f" - {plats['rum']}"
-            if plats['hylla_sektion']:
-                plats_str += f" ({plats['hylla_sektion']})"
-            self.plats_listbox.insert(tk.END, plats_str)
-            self.plats_id_mapping[idx] = plats['id']
+        # Plats-ID och sorteringsnyckel för varje listbox-rad, i samma ordning
+        self.plats_id_mapping = [plats.id for plats in platser]
+        self._plats_sortering = [(plats.byggnad, plats.rum or "") for plats in platser]
+        # Alla rader i ett enda insert-anrop till Tk
+        self.plats_listbox.insert(tk.END, *(plats.visningsnamn for plats in platser))
 
     def ta_bort_vald_plats(self):
         """Ta bort vald plats från databasen"""
@@ -1816,14 +3053,10 @@ Registrerad av:        {foremal['registrerad_av'] if foremal['registrerad_av'] e
 
         # Hämta plats-id från mappningen
         selected_index = selection[0]
-        plats_id = self.plats_id_mapping.get(selected_index)
+        plats_id = self.plats_id_mapping[selected_index]
 
         # Kontrollera om platsen används av föremål
-        self.db.cursor.execute(
-            "SELECT COUNT(*) FROM foremal WHERE placering_id = ?",
-            (plats_id,)
-        )
-        antal_foremal = self.db.cursor.fetchone()[0]
+        antal_foremal = self.db.rakna_foremal_pa_plats(plats_id)
 
         # Bekräfta borttagning
         if antal_foremal > 0:
@@ -1843,7 +3076,9 @@ Registrerad av:        {foremal['registrerad_av'] if foremal['registrerad_av'] e
             try:
                 self.db.ta_bort_plats(plats_id)
                 messagebox.showinfo("Borttagen", "Platsen har tagits bort!")
-                self.uppdatera_plats_listbox()
+                self.plats_listbox.delete(selected_index)
+                del self.plats_id_mapping[selected_index]
+                del self._plats_sortering[selected_index]
                 self.uppdatera_plats_lista()
             except Exception as e:
                 messagebox.showerror("Fel", f"Kunde inte ta bort plats: {str(e)}")
@@ -1861,32 +3096,68 @@ Registrerad av:        {foremal['registrerad_av'] if foremal['registrerad_av'] e
         anteckningar = self.givare_anteckningar_text.get("1.0", tk.END).strip()
 
         try:
-            self.db.lagg_till_givare(namn, adress, telefon, epost, anteckningar)
-            messagebox.showinfo("Sparat", f"Givare '{namn}' tillagd!")
+            givare_id = self.db.lagg_till_givare(namn, adress, telefon, epost, anteckningar)
+            self.visa_status(f"Givare '{namn}' tillagd")
             self.givare_namn_entry.delete(0, tk.END)
             self.givare_adress_entry.delete(0, tk.END)
             self.givare_telefon_entry.delete(0, tk.END)
             self.givare_epost_entry.delete(0, tk.END)
             self.givare_anteckningar_text.delete("1.0", tk.END)
-            self.uppdatera_givare_listbox()
+            # Lägg bara in den nya raden på sin plats i sorteringen
+            idx = bisect.bisect(self._givare_sortering, namn)
+            self._givare_sortering.insert(idx, namn)
+            self.givare_listbox.insert(idx, f"{givare_id}: {namn}")
         except Exception as e:
             messagebox.showerror("Fel", f"Kunde inte lägga till givare: {str(e)}")
 
     def uppdatera_givare_listbox(self):
-        """Uppdatera givarlistan"""
+        """Bygg givarlistan från databasen (ändringar görs sedan radvis)"""
         self.givare_listbox.delete(0, tk.END)
         givare = self.db.hamta_givare()
-        for g in givare:
-            self.givare_listbox.insert(tk.END, f"{g['id']}: {g['namn']}")
+        self._givare_sortering = [g.namn for g in givare]
+        # Alla rader i ett enda insert-anrop till Tk
+        self.givare_listbox.insert(tk.END, *(f"{g.id}: {g.namn}" for g in givare))
 
-    def uppdatera_statistik(self):
-        """Uppdatera statistikvisning"""
-        stats = self.db.hamta_statistik()
+    def schemalagg_statistik(self, fordrojning_ms=500):
+        """Uppdatera statistiken när fliken har varit vald en stund
+
+        Flera flikbyten i snabb följd leder bara till en hämtning.
+        """
+        if self._statistik_after_id is not None:
+            self.root.after_cancel(self._statistik_after_id)
+        self._statistik_after_id = self.root.after(fordrojning_ms, self.uppdatera_statistik)
+
+    def uppdatera_statistik(self, anvand_cache=True):
+        """Hämta statistiken i en bakgrundstråd och visa den när den är klar"""
+        self._statistik_after_id = None
+        self._statistik_generation += 1
+        generation = self._statistik_generation
+        self.statistik_hamtad_label.config(text="Hämtar statistik...")
+
+        future = self._arbetspool.submit(self.db.hamta_statistik, anvand_cache)
+        future.add_done_callback(
+            lambda f: self.i_tk_traden(self.visa_statistik, generation, f)
+        )
+
+    def visa_statistik(self, generation, future):
+        """Visa statistik som hämtats i bakgrunden (körs i Tk-tråden)"""
+        if generation != self._statistik_generation:
+            return  # En senare hämtning har startats
+
+        try:
+            stats = future.result()
+        except Exception as e:
+            self.statistik_hamtad_label.config(text="")
+            messagebox.showerror("Fel", f"Kunde inte hämta statistik: {str(e)}")
+            return
+
+        self.statistik_hamtad_label.config(text=f"Senast uppdaterad: {stats['hamtad']}")
 
         self.statistik_text.config(state=tk.NORMAL)
         self.statistik_text.delete("1.0", tk.END)
 
-        text = f"""
+        # Delarna samlas i en lista och sätts ihop en gång på slutet
+        delar = [f"""
 ╔══════════════════════════════════════════════════════════════╗
                     MUSEISTATISTIK
 ╚══════════════════════════════════════════════════════════════╝
@@ -1897,25 +3168,25 @@ TOTALT ANTAL FÖREMÅL: {stats['totalt']}
 
 FÖRDELNING PER KATEGORI:
 
-"""
+"""]
 
-        for kat in stats['per_kategori']:
-            if kat[1] > 0:  # Visa bara kategorier med föremål
-                text += f"  {kat[0]:<30} {kat[1]:>5} st\n"
+        # Visa bara kategorier med föremål
+        delar.extend(f"  {namn:<30} {antal:>5} st\n" for namn, antal in stats['per_kategori'] if antal > 0)
 
-        text += f"""
+        delar.append("""
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
 SENASTE REGISTRERINGAR:
 
-"""
+""")
 
-        for foremal in stats['senaste']:
-            text += f"  {foremal['accessionsnummer']:<15} {foremal['namn']:<40} ({foremal['datum_registrerat']})\n"
+        delar.extend(f"  {foremal.accessionsnummer:<15} {foremal.namn:<40} ({foremal.datum_registrerat})\n"
+                     for foremal in stats['senaste'])
 
-        text += """
+        delar.append("""
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-"""
+""")
+        text = "".join(delar)
 
         self.statistik_text.insert("1.0", text)
         self.statistik_text.config(state=tk.DISABLED)
@@ -1928,11 +3199,53 @@ SENASTE REGISTRERINGAR:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_path = backup_dir / f"hembygdsmuseum_backup_{timestamp}.db"
 
-        try:
-            shutil.copy2(self.db.db_path, backup_path)
+        # Förloppsfönster, uppdateras mellan varje omgång sidor som kopieras
+        forlopp_window = tk.Toplevel(self.root)
+        forlopp_window.title("Backup")
+        forlopp_window.transient(self.root)
+        forlopp_window.protocol("WM_DELETE_WINDOW", lambda: None)  # Stängs när backupen är klar
+        ttk.Label(forlopp_window, text=f"Skapar backup:\n{backup_path}").pack(padx=20, pady=(15, 5))
+        forlopp = ttk.Progressbar(forlopp_window, length=300, mode='determinate')
+        forlopp.pack(padx=20, pady=(5, 15))
+
+        def visa_forlopp(kvar, totalt):
+            forlopp.config(maximum=totalt, value=totalt - kvar)
+
+        def klar(future):
+            forlopp_window.destroy()
+            try:
+                future.result()
+            except Exception as e:
+                messagebox.showerror("Fel", f"Kunde inte skapa backup: {str(e)}")
+                return
             messagebox.showinfo("Backup", f"Backup skapad:\n{backup_path}")
+
+        # Backupen körs i en bakgrundstråd, förlopp och resultat visas i Tk-tråden
+        future = self._arbetspool.submit(
+            self.db.backup, backup_path,
+            lambda status, kvar, totalt: self.i_tk_traden(visa_forlopp, kvar, totalt),
+            256)
+        future.add_done_callback(lambda f: self.i_tk_traden(klar, f))
+
+    def optimera_databas(self):
+        """Optimera databasen"""
+        try:
+            self.db.optimera()
+            messagebox.showinfo("Optimera databas", "Databasen har optimerats.")
         except Exception as e:
-            messagebox.showerror("Fel", f"Kunde inte skapa backup: {str(e)}")
+            messagebox.showerror("Fel", f"Kunde inte optimera databasen: {str(e)}")
+
+    def stang(self):
+        """Stäng bakgrundstrådar och databasanslutningar
+
+        Körs i Tk-tråden och väntar inte in pågående jobb: de anropar inte Tk
+        och deras resultat kastas, eftersom kön inte töms längre.
+        """
+        self._stanger = True
+        self.root.after_cancel(self._tk_ko_after_id)
+        self._sokpool.shutdown(wait=False, cancel_futures=True)
+        self._arbetspool.shutdown(wait=False, cancel_futures=True)
+        self.db.stang()
 
     def visa_om(self):
         """Visa Om-dialog"""
@@ -1948,32 +3261,98 @@ SENASTE REGISTRERINGAR:
 
     def skriv_ut_valt_foremal(self):
         """Skriv ut information om valt föremål"""
+        self.sakerstall_flik(self.skapa_sok_flik)
         selection = self.resultat_tree.selection()
         if not selection:
             messagebox.showwarning("Varning", "Välj ett föremål först!\n\nGå till fliken 'Sök föremål' och välj ett föremål i listan.")
             return
 
-        item = self.resultat_tree.item(selection[0])
-        foremal_id = int(item['text'])
-        foremal = self.db.hamta_foremal(foremal_id)
-        foton = self.db.hamta_foton(foremal_id)
+        foremal_id = int(selection[0])
+        foremal, foton = self.db.hamta_foremal_med_foton(foremal_id)
+
+        if not foremal:
+            messagebox.showerror("Fel", "Kunde inte hämta föremålsinformation")
+            return
 
-        if foremal:
+        def skriv_ut(foton):
             html = PrintManager.skriv_ut_foremal(foremal, foton)
             PrintManager.visa_utskrift(html, "Föremålsinformation")
-        else:
+
+        self.sakerstall_miniatyrer(foremal_id, foton, skriv_ut)
+
+    def exportera_valt_foremal(self):
+        """Spara valt föremål som en fristående HTML-fil med inbäddade bilder"""
+        self.sakerstall_flik(self.skapa_sok_flik)
+        selection = self.resultat_tree.selection()
+        if not selection:
+            messagebox.showwarning("Varning", "Välj ett föremål först!\n\nGå till fliken 'Sök föremål' och välj ett föremål i listan.")
+            return
+
+        foremal_id = int(selection[0])
+        foremal, foton = self.db.hamta_foremal_med_foton(foremal_id)
+
+        if not foremal:
             messagebox.showerror("Fel", "Kunde inte hämta föremålsinformation")
+            return
+
+        filsokvag = filedialog.asksaveasfilename(
+            title="Exportera föremål",
+            defaultextension=".html",
+            initialfile=f"{foremal.accessionsnummer}.html",
+            filetypes=[("HTML-filer", "*.html"), ("Alla filer", "*.*")]
+        )
+        if not filsokvag:
+            return
+
+        def exportera(foton):
+            try:
+                html = PrintManager.skriv_ut_foremal(foremal, foton)
+                PrintManager.exportera_html(html, filsokvag)
+                messagebox.showinfo("Export", f"Föremålet exporterades till:\n{filsokvag}")
+            except Exception as e:
+                messagebox.showerror("Fel", f"Kunde inte exportera föremålet: {str(e)}")
+
+        self.sakerstall_miniatyrer(foremal_id, foton, exportera)
+
+    def sakerstall_miniatyrer(self, foremal_id, foton, klar):
+        """Skapa miniatyrer som saknas i bakgrunden, spara dem och anropa klar(foton)"""
+        saknas = [foto for foto in foton
+                  if not (foto.miniatyr_sokvag and os.path.exists(foto.miniatyr_sokvag))
+                  and os.path.exists(foto.filsokvag)]
+        if not saknas:
+            klar(foton)
+            return
+
+        # Skala alla bilder parallellt medan Tk fortsätter att rita om fönstret
+        jobb = [(foto.id, self._arbetspool.submit(skapa_miniatyr, foto.filsokvag))
+                for foto in saknas]
+        self.root.config(cursor="watch")
+
+        def kontrollera():
+            if not all(future.done() for _, future in jobb):
+                self.root.after(50, kontrollera)
+                return
+
+            self.root.config(cursor="")
+            # Databasen skrivs bara från Tk-tråden
+            with self.db.transaktion():
+                for foto_id, future in jobb:
+                    miniatyr = future.result()
+                    if miniatyr:
+                        self.db.uppdatera_miniatyr(foto_id, miniatyr)
+            klar(self.db.hamta_foton(foremal_id))
+
+        kontrollera()
 
     def skriv_ut_foremalslista(self):
         """Skriv ut lista över föremål"""
         # Hämta aktuella sökresultat eller alla föremål
-        resultat = []
-        for item in self.resultat_tree.get_children():
-            item_data = self.resultat_tree.item(item)
-            foremal_id = int(item_data['text'])
-            foremal = self.db.hamta_foremal(foremal_id)
-            if foremal:
-                resultat.append(foremal)
+        self.sakerstall_flik(self.skapa_sok_flik)
+        # Radernas id är föremålens id, så ingen fråga per rad till Tk behövs
+        foremal_ids = [int(iid) for iid in self.resultat_tree.get_children()]
+        # Alla föremål hämtas på en gång, sedan i samma ordning som i listan
+        per_id = self.db.hamta_foremal_batch(foremal_ids)
+        resultat = [per_id[foremal_id] for foremal_id in foremal_ids if foremal_id in per_id]
 
         if not resultat:
             # Om ingen sökning gjorts, hämta alla föremål
@@ -2026,8 +3405,7 @@ SENASTE REGISTRERINGAR:
             return
 
         # Hämta föremålsinformation
-        item = self.resultat_tree.item(selection[0])
-        foremal_id = int(item['text'])
+        foremal_id = int(selection[0])
         foremal = self.db.hamta_foremal(foremal_id)
 
         if not foremal:
@@ -2038,8 +3416,8 @@ SENASTE REGISTRERINGAR:
         svar = messagebox.askyesno(
             "Bekräfta borttagning",
             f"Är du säker på att du vill ta bort detta föremål?\n\n"
-            f"Accessionsnummer: {foremal['accessionsnummer']}\n"
-            f"Namn: {foremal['namn']}\n\n"
+            f"Accessionsnummer: {foremal.accessionsnummer}\n"
+            f"Namn: {foremal.namn}\n\n"
             f"VARNING: Detta kan inte ångras!\n"
             f"Alla bilder och kopplingar kommer också att tas bort."
         )
@@ -2048,21 +3426,17 @@ SENASTE REGISTRERINGAR:
             return
 
         try:
-            # Ta bort föremål från databasen (returnerar fotosökvägar)
-            fotosokvagor = self.db.ta_bort_foremal(foremal_id)
+            # Ta bort föremål från databasen (returnerar bild- och miniatyrsökvägar)
+            foton = self.db.ta_bort_foremal(foremal_id)
 
-            # Ta bort bildfilerna från disken
-            for fotsokvag in fotosokvagor:
-                try:
-                    if os.path.exists(fotsokvag):
-                        os.remove(fotsokvag)
-                except Exception as e:
-                    print(f"Kunde inte ta bort bildfil {fotsokvag}: {e}")
+            # Ta bort bildfilerna och deras miniatyrer från disken
+            for fotsokvag, miniatyr in foton:
+                ta_bort_bild(fotsokvag, miniatyr)
 
             # Ta bort från trädet
             self.resultat_tree.delete(selection[0])
 
-            messagebox.showinfo("Borttaget", f"Föremål '{foremal['namn']}' har tagits bort.")
+            messagebox.showinfo("Borttaget", f"Föremål '{foremal.namn}' har tagits bort.")
 
         except Exception as e:
             messagebox.showerror("Fel", f"Kunde inte ta bort föremål: {str(e)}")
@@ -2075,8 +3449,7 @@ SENASTE REGISTRERINGAR:
             return
 
         # Hämta föremålsinformation
-        item = self.resultat_tree.item(selection[0])
-        foremal_id = int(item['text'])
+        foremal_id = int(selection[0])
         foremal = self.db.hamta_foremal(foremal_id)
 
         if not foremal:
@@ -2085,7 +3458,7 @@ SENASTE REGISTRERINGAR:
 
         # Skapa redigeringsfönster
         edit_window = tk.Toplevel(self.root)
-        edit_window.title(f"Redigera föremål: {foremal['namn']}")
+        edit_window.title(f"Redigera föremål: {foremal.namn}")
         edit_window.geometry("800x900")
 
         # Skapa scrollbar
@@ -2107,65 +3480,65 @@ SENASTE REGISTRERINGAR:
         # Accessionsnummer
         ttk.Label(scrollable_frame, text="Accessionsnummer*:").grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
         acc_nr_entry = ttk.Entry(scrollable_frame, width=30)
-        acc_nr_entry.insert(0, foremal['accessionsnummer'])
+        acc_nr_entry.insert(0, foremal.accessionsnummer)
         acc_nr_entry.grid(row=row, column=1, padx=5, pady=5, sticky=tk.W)
         row += 1
 
         # Namn
         ttk.Label(scrollable_frame, text="Namn*:").grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
         namn_entry = ttk.Entry(scrollable_frame, width=50)
-        namn_entry.insert(0, foremal['namn'])
+        namn_entry.insert(0, foremal.namn)
         namn_entry.grid(row=row, column=1, columnspan=2, padx=5, pady=5, sticky=tk.W)
         row += 1
 
         # Beskrivning
         ttk.Label(scrollable_frame, text="Beskrivning:").grid(row=row, column=0, sticky=tk.NW, padx=5, pady=5)
         beskrivning_text = tk.Text(scrollable_frame, width=50, height=5)
-        if foremal['beskrivning']:
-            beskrivning_text.insert("1.0", foremal['beskrivning'])
+        if foremal.beskrivning:
+            beskrivning_text.insert("1.0", foremal.beskrivning)
         beskrivning_text.grid(row=row, column=1, columnspan=2, padx=5, pady=5, sticky=tk.W)
         row += 1
 
         # Kategori
         ttk.Label(scrollable_frame, text="Kategori:").grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
         kategori_var = tk.StringVar()
-        if foremal['kategori_namn']:
-            kategori_var.set(foremal['kategori_namn'])
+        if foremal.kategori_namn:
+            kategori_var.set(foremal.kategori_namn)
         kategori_combo = ttk.Combobox(scrollable_frame, textvariable=kategori_var, width=30)
         kategorier = self.db.hamta_kategorier()
-        kategori_combo['values'] = [kat['namn'] for kat in kategorier]
+        kategori_combo['values'] = [kat.namn for kat in kategorier]
         kategori_combo.grid(row=row, column=1, padx=5, pady=5, sticky=tk.W)
         row += 1
 
         # Material
         ttk.Label(scrollable_frame, text="Material:").grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
         material_entry = ttk.Entry(scrollable_frame, width=30)
-        if foremal['material']:
-            material_entry.insert(0, foremal['material'])
+        if foremal.material:
+            material_entry.insert(0, foremal.material)
         material_entry.grid(row=row, column=1, padx=5, pady=5, sticky=tk.W)
         row += 1
 
         # Tillverkningsår
         ttk.Label(scrollable_frame, text="Tillverkningsår:").grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
         tillv_ar_entry = ttk.Entry(scrollable_frame, width=30)
-        if foremal['tillverkningsar']:
-            tillv_ar_entry.insert(0, foremal['tillverkningsar'])
+        if foremal.tillverkningsar:
+            tillv_ar_entry.insert(0, foremal.tillverkningsar)
         tillv_ar_entry.grid(row=row, column=1, padx=5, pady=5, sticky=tk.W)
         row += 1
 
         # Tillverkningsplats
         ttk.Label(scrollable_frame, text="Tillverkningsplats:").grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
         tillv_plats_entry = ttk.Entry(scrollable_frame, width=30)
-        if foremal['tillverkningsplats']:
-            tillv_plats_entry.insert(0, foremal['tillverkningsplats'])
+        if foremal.tillverkningsplats:
+            tillv_plats_entry.insert(0, foremal.tillverkningsplats)
         tillv_plats_entry.grid(row=row, column=1, padx=5, pady=5, sticky=tk.W)
         row += 1
 
         # Tillverkare
         ttk.Label(scrollable_frame, text="Tillverkare:").grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
         tillverkare_entry = ttk.Entry(scrollable_frame, width=30)
-        if foremal['tillverkare']:
-            tillverkare_entry.insert(0, foremal['tillverkare'])
+        if foremal.tillverkare:
+            tillverkare_entry.insert(0, foremal.tillverkare)
         tillverkare_entry.grid(row=row, column=1, padx=5, pady=5, sticky=tk.W)
         row += 1
 
@@ -2176,34 +3549,34 @@ SENASTE REGISTRERINGAR:
 
         ttk.Label(matt_frame, text="L:").pack(side=tk.LEFT)
         matt_l_entry = ttk.Entry(matt_frame, width=10)
-        if foremal['matt_langd']:
-            matt_l_entry.insert(0, str(foremal['matt_langd']))
+        if foremal.matt_langd:
+            matt_l_entry.insert(0, str(foremal.matt_langd))
         matt_l_entry.pack(side=tk.LEFT, padx=2)
 
         ttk.Label(matt_frame, text="B:").pack(side=tk.LEFT, padx=(10,0))
         matt_b_entry = ttk.Entry(matt_frame, width=10)
-        if foremal['matt_bredd']:
-            matt_b_entry.insert(0, str(foremal['matt_bredd']))
+        if foremal.matt_bredd:
+            matt_b_entry.insert(0, str(foremal.matt_bredd))
         matt_b_entry.pack(side=tk.LEFT, padx=2)
 
         ttk.Label(matt_frame, text="H:").pack(side=tk.LEFT, padx=(10,0))
         matt_h_entry = ttk.Entry(matt_frame, width=10)
-        if foremal['matt_hojd']:
-            matt_h_entry.insert(0, str(foremal['matt_hojd']))
+        if foremal.matt_hojd:
+            matt_h_entry.insert(0, str(foremal.matt_hojd))
         matt_h_entry.pack(side=tk.LEFT, padx=2)
         row += 1
 
         # Vikt
         ttk.Label(scrollable_frame, text="Vikt (g):").grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
         vikt_entry = ttk.Entry(scrollable_frame, width=30)
-        if foremal['vikt']:
-            vikt_entry.insert(0, str(foremal['vikt']))
+        if foremal.vikt:
+            vikt_entry.insert(0, str(foremal.vikt))
         vikt_entry.grid(row=row, column=1, padx=5, pady=5, sticky=tk.W)
         row += 1
 
         # Skick
         ttk.Label(scrollable_frame, text="Skick:").grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
-        skick_var = tk.StringVar(value=foremal['skick'] if foremal['skick'] else "Gott")
+        skick_var = tk.StringVar(value=foremal.skick or "Gott")
         skick_frame = ttk.Frame(scrollable_frame)
         skick_frame.grid(row=row, column=1, sticky=tk.W, padx=5, pady=5)
         ttk.Radiobutton(skick_frame, text="Utmärkt", variable=skick_var, value="Utmärkt").pack(side=tk.LEFT)
@@ -2218,18 +3591,10 @@ SENASTE REGISTRERINGAR:
         plats_lista = []
         current_plats = ""
         for plats in platser:
-            plats_str = f"{plats['byggnad']}"
-            if plats['rum']:
-                plats_str += f" - {plats['rum']}"
-            if plats['hylla_sektion']:
-                plats_str += f" - {plats['hylla_sektion']}"
-            plats_lista.append(plats_str)
+            plats_lista.append(plats.visningsnamn)
             # Sätt nuvarande plats
-            if foremal['byggnad'] and plats['byggnad'] == foremal['byggnad']:
-                if (not foremal['rum'] and not plats['rum']) or (foremal['rum'] == plats['rum']):
-                    if (not foremal['hylla_sektion'] and not plats['hylla_sektion']) or \
-                       (foremal['hylla_sektion'] == plats['hylla_sektion']):
-                        current_plats = plats_str
+            if plats.id == foremal.placering_id:
+                current_plats = plats.visningsnamn
 
         if current_plats:
             placering_var.set(current_plats)
@@ -2241,8 +3606,8 @@ SENASTE REGISTRERINGAR:
         # Registrerad av
         ttk.Label(scrollable_frame, text="Registrerad av:").grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
         reg_av_entry = ttk.Entry(scrollable_frame, width=30)
-        if foremal['registrerad_av']:
-            reg_av_entry.insert(0, foremal['registrerad_av'])
+        if foremal.registrerad_av:
+            reg_av_entry.insert(0, foremal.registrerad_av)
         reg_av_entry.grid(row=row, column=1, padx=5, pady=5, sticky=tk.W)
         row += 1
 
@@ -2257,28 +3622,9 @@ SENASTE REGISTRERINGAR:
                 messagebox.showerror("Fel", "Namn måste anges!")
                 return
 
-            # Hämta kategori-id
-            kategori_id = None
-            kategori_namn = kategori_var.get()
-            if kategori_namn:
-                for kat in kategorier:
-                    if kat['namn'] == kategori_namn:
-                        kategori_id = kat['id']
-                        break
-
-            # Hämta plats-id
-            placering_id = None
-            plats_text = placering_var.get()
-            if plats_text:
-                for plats in platser:
-                    plats_str = f"{plats['byggnad']}"
-                    if plats['rum']:
-                        plats_str += f" - {plats['rum']}"
-                    if plats['hylla_sektion']:
-                        plats_str += f" - {plats['hylla_sektion']}"
-                    if plats_str == plats_text:
-                        placering_id = plats['id']
-                        break
+            # Hämta kategori-id och plats-id
+            kategori_id = self.db.hamta_kategori_id(kategori_var.get())
+            placering_id = self.db.hamta_plats_id(placering_var.get())
 
             # Konvertera numeriska värden
             def safe_float(val):
@@ -2312,17 +3658,17 @@ SENASTE REGISTRERINGAR:
 
                 # Uppdatera trädet i sökresultatet
                 updated_foremal = self.db.hamta_foremal(foremal_id)
-                plats_str = updated_foremal['byggnad'] if updated_foremal['byggnad'] else ""
-                if updated_foremal['rum']:
-                    plats_str += f" - {updated_foremal['rum']}"
+                plats_str = updated_foremal.byggnad or ""
+                if updated_foremal.rum:
+                    plats_str += f" - {updated_foremal.rum}"
 
                 self.resultat_tree.item(
                     selection[0],
                     values=(
-                        updated_foremal['accessionsnummer'],
-                        updated_foremal['namn'],
-                        updated_foremal['kategori_namn'] if updated_foremal['kategori_namn'] else "",
-                        updated_foremal['material'] if updated_foremal['material'] else "",
+                        updated_foremal.accessionsnummer,
+                        updated_foremal.namn,
+                        updated_foremal.kategori_namn or "",
+                        updated_foremal.material or "",
                         plats_str
                     )
                 )
@@ -2352,7 +3698,7 @@ def main():
 
     # Stäng databasanslutningen när fönstret stängs
     def on_closing():
-        app.db.stang()
+        app.stang()
         root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_closing)
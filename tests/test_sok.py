@@ -0,0 +1,49 @@
+"""Tester för fritextsökningen i MuseumDB"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from hembygdsmuseum import MuseumDB
+
+
+class TestSok(unittest.TestCase):
+    def setUp(self):
+        self.katalog = tempfile.TemporaryDirectory()
+        self.db = MuseumDB(os.path.join(self.katalog.name, "test.db"))
+        for nr, (namn, beskrivning) in enumerate([
+            ("Slåttermaskin", "Hästdragen, för vall"),
+            ("Lie", "Används med vispesticka"),
+        ], start=1):
+            self.db.lagg_till_foremal((
+                f"HM-{nr}", namn, beskrivning, None, "", "", "", "",
+                None, None, None, None, "Gott", None, "2026-01-01 12:00:00", ""
+            ))
+
+    def tearDown(self):
+        self.db.stang()
+        self.katalog.cleanup()
+
+    def sok(self, sokterm):
+        return [rad.namn for rad in self.db.sok_foremal(sokterm)]
+
+    def test_mitt_i_ord(self):
+        self.assertEqual(self.sok("maskin"), ["Slåttermaskin"])
+        self.assertEqual(self.sok("stick"), ["Lie"])
+
+    def test_versaler_och_flera_ord(self):
+        self.assertEqual(self.sok("SLÅTTER"), ["Slåttermaskin"])
+        self.assertEqual(self.sok("lått vall"), ["Slåttermaskin"])
+
+    def test_korta_sokord(self):
+        self.assertEqual(self.sok("ie"), ["Lie"])
+
+    def test_tom_sokterm(self):
+        self.assertEqual(len(self.sok("")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()